@@ -2,16 +2,15 @@
 from __future__ import annotations
 
 import argparse
+import io
 import os
-from collections import defaultdict
+from collections.abc import Iterable, Iterator
 from datetime import datetime
+from itertools import groupby
 from pathlib import Path
 
 import psycopg2
 
-EXCLUDED_SCHEMAS = {"pg_catalog", "information_schema"}
-
-
 def load_env_file(env_path: Path) -> dict[str, str]:
     values: dict[str, str] = {}
     if not env_path.exists():
@@ -55,8 +54,10 @@ def build_connection_kwargs(dotenv: dict[str, str]) -> dict[str, str | int]:
     }
 
 
-def fetch_schema_rows(conn) -> list[tuple[str, str, str, str, str]]:
-    with conn.cursor() as cur:
+def fetch_schema_rows(conn) -> Iterator[tuple[str, str, str, str, str]]:
+    # Named cursors are server-side: rows stream in batches of itersize instead of one fetchall().
+    with conn.cursor(name="schema_stream") as cur:
+        cur.itersize = 10000
         cur.execute(
             """
             select
@@ -74,57 +75,46 @@ def fetch_schema_rows(conn) -> list[tuple[str, str, str, str, str]]:
             order by c.table_schema, c.table_name, c.ordinal_position
             """
         )
-        return list(cur.fetchall())
-
+        yield from cur
 
-def render_snapshot(rows: list[tuple[str, str, str, str, str]], source_host: str, source_db: str) -> str:
-    grouped: dict[tuple[str, str], list[tuple[str, str, str]]] = defaultdict(list)
-    for schema, table, column, data_type, nullable in rows:
-        grouped[(schema, table)].append((column, data_type, nullable))
 
+def render_snapshot(rows: Iterable[tuple[str, str, str, str, str]], source_host: str, source_db: str) -> str:
     now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    lines: list[str] = [
-        "# DB Schema Snapshot",
-        "",
-        f"- generated_at_local: {now}",
-        f"- source: {source_host}/{source_db}",
-        "- scope: non-system BASE TABLE columns from information_schema",
-        "",
-        "## Tables",
-        "",
-    ]
+    buf = io.StringIO()
+    buf.write(
+        "# DB Schema Snapshot\n"
+        "\n"
+        f"- generated_at_local: {now}\n"
+        f"- source: {source_host}/{source_db}\n"
+        "- scope: non-system BASE TABLE columns from information_schema\n"
+        "\n"
+        "## Tables\n"
+        "\n"
+    )
 
+    # Rows arrive ordered by schema, table, ordinal_position and system schemas are filtered in SQL.
     current_schema = None
-    for (schema, table), columns in grouped.items():
-        if schema in EXCLUDED_SCHEMAS:
-            continue
+    for (schema, table), table_rows in groupby(rows, key=lambda row: (row[0], row[1])):
         if current_schema != schema:
             current_schema = schema
-            lines.extend([f"### {schema}", ""])
-
-        lines.append(f"#### {schema}.{table}")
-        lines.append("")
-        lines.append("| column | type | nullable |")
-        lines.append("|---|---|---|")
-        for name, data_type, nullable in columns:
-            lines.append(f"| `{name}` | `{data_type}` | `{nullable}` |")
-        lines.append("")
-
-    lines.extend(
-        [
-            "## Quick Verification SQL",
-            "",
-            "```sql",
-            "select table_schema, table_name",
-            "from information_schema.tables",
-            "where table_schema not in ('pg_catalog', 'information_schema')",
-            "order by table_schema, table_name;",
-            "```",
-            "",
-        ]
+            buf.write(f"### {schema}\n\n")
+
+        buf.write(f"#### {schema}.{table}\n\n| column | type | nullable |\n|---|---|---|\n")
+        for _, _, name, data_type, nullable in table_rows:
+            buf.write(f"| `{name}` | `{data_type}` | `{nullable}` |\n")
+        buf.write("\n")
+
+    buf.write(
+        "## Quick Verification SQL\n"
+        "\n"
+        "```sql\n"
+        "select table_schema, table_name\n"
+        "from information_schema.tables\n"
+        "where table_schema not in ('pg_catalog', 'information_schema')\n"
+        "order by table_schema, table_name;\n"
+        "```\n"
     )
-
-    return "\n".join(lines)
+    return buf.getvalue()
 
 
 def parse_args() -> argparse.Namespace:
@@ -147,19 +137,25 @@ def main() -> None:
     dotenv = load_env_file(Path(args.env_file))
     conn_kwargs = build_connection_kwargs(dotenv)
 
-    with psycopg2.connect(**conn_kwargs) as conn:
-        rows = fetch_schema_rows(conn)
+    column_count = 0
 
-    snapshot = render_snapshot(
-        rows,
-        source_host=str(conn_kwargs["host"]),
-        source_db=str(conn_kwargs["dbname"]),
-    )
+    def counted(rows: Iterable[tuple[str, str, str, str, str]]) -> Iterator[tuple[str, str, str, str, str]]:
+        nonlocal column_count
+        for row in rows:
+            column_count += 1
+            yield row
+
+    with psycopg2.connect(**conn_kwargs) as conn:
+        snapshot = render_snapshot(
+            counted(fetch_schema_rows(conn)),
+            source_host=str(conn_kwargs["host"]),
+            source_db=str(conn_kwargs["dbname"]),
+        )
 
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
     output_path.write_text(snapshot, encoding="utf-8")
-    print(f"wrote {output_path} ({len(rows)} columns)")
+    print(f"wrote {output_path} ({column_count} columns)")
 
 
 if __name__ == "__main__":
@@ -41,7 +41,7 @@ from app.core.task_catalog import (
     validate_catalog_payload,
 )
 from app.core.settings import get_settings
-from app.core.train_config import TaskType, dataclass_schema, get_metric_for_task
+from app.core.train_config import TaskType, get_metric_for_task
 from app.services.ftp_model_registry import StageType, ftp_registry
 from app.services.ftp_server_manager import ftp_server_manager
 from app.services.ftp_service import download_file_via_ftp
@@ -85,46 +85,7 @@ def _task_definition(task_type: str) -> TaskDefinition:
 
 
 def _build_task_schema(task: TaskDefinition) -> dict[str, Any]:
-    schema = dataclass_schema(task.base_task_type)
-    field_map = {field["name"]: dict(field) for field in schema["fields"]}
-    for extra in task.extra_fields:
-        field_map[extra.name] = extra.to_schema_field()
-
-    for field_name, patch in task.field_overrides.items():
-        if field_name not in field_map:
-            continue
-        field_data = field_map[field_name]
-        for key in {"type", "required", "default", "label", "description", "group", "choices", "min", "max", "step"}:
-            if key in patch:
-                field_data[key] = patch[key]
-
-    filtered_items = [
-        field
-        for name, field in field_map.items()
-        if name not in task.hidden_fields
-    ]
-
-    order_index = {name: idx for idx, name in enumerate(task.field_order)}
-    filtered_items.sort(key=lambda item: (order_index.get(item["name"], 10_000), item["name"]))
-
-    return {
-        "taskType": task.task_type,
-        "baseTaskType": task.base_task_type,
-        "title": task.title,
-        "description": task.description,
-        "runner": {
-            "startMethod": task.runner.start_method,
-            "target": task.runner.target,
-            "targetEnvVar": task.runner.target_env_var,
-        },
-        "mlflow": {
-            "metric": task.mlflow.metric,
-            "mode": task.mlflow.mode,
-            "modelName": task.mlflow.model_name,
-            "artifactPath": task.mlflow.artifact_path,
-        },
-        "fields": filtered_items,
-    }
+    return task.schema
 
 
 def _task_summary(task: TaskDefinition) -> dict[str, Any]:
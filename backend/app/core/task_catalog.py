@@ -4,9 +4,10 @@ import copy
 import os
 import re
 from dataclasses import dataclass
-from functools import lru_cache
+from functools import cached_property, lru_cache
 from pathlib import Path
-from typing import Any, Literal
+from types import MappingProxyType
+from typing import Any, Literal, Mapping
 
 import yaml
 
@@ -20,6 +21,9 @@ RegistryStage = Literal["dev", "release"]
 ExtraFieldValueType = Literal["str", "int", "float", "bool"]
 FieldInputType = Literal["text", "number", "boolean", "select"]
 
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 DEFAULT_CATALOG: dict[str, Any] = {
     "tasks": [
         {
@@ -54,6 +58,7 @@ DEFAULT_CATALOG: dict[str, Any] = {
                 "use_amp",
                 "force_cpu",
                 "save_every",
+                "save_optimizer_every",
                 "model_name",
                 "num_classes",
                 "image_size",
@@ -98,6 +103,7 @@ DEFAULT_CATALOG: dict[str, Any] = {
                 "use_amp",
                 "force_cpu",
                 "save_every",
+                "save_optimizer_every",
                 "encoder_name",
                 "num_classes",
                 "input_height",
@@ -147,11 +153,11 @@ def default_catalog_payload() -> dict[str, Any]:
 
 
 def render_catalog_yaml(payload: dict[str, Any]) -> str:
-    return yaml.safe_dump(payload, sort_keys=False, allow_unicode=True)
+    return yaml.dump(payload, Dumper=_YAML_DUMPER, sort_keys=False, allow_unicode=True)
 
 
 def parse_catalog_yaml(content: str, *, source: str) -> dict[str, Any]:
-    loaded = yaml.safe_load(content) or {}
+    loaded = yaml.load(content, Loader=_YAML_LOADER) or {}
     if not isinstance(loaded, dict):
         raise ValueError(f"Invalid catalog format: {source}")
     return loaded
@@ -249,7 +255,8 @@ class ExtraFieldDefinition:
     cli_arg: str | None = None
     pass_when_empty: bool = False
 
-    def cli_flag(self) -> str:
+    @cached_property
+    def cli_flag_str(self) -> str:
         if self.cli_arg:
             return self.cli_arg if self.cli_arg.startswith("--") else f"--{self.cli_arg.lstrip('-')}"
         return f"--{self.name.replace('_', '-')}"
@@ -268,7 +275,7 @@ class ExtraFieldDefinition:
             "min": self.min_value,
             "max": self.max_value,
             "step": self.step,
-            "cliArg": self.cli_flag(),
+            "cliArg": self.cli_flag_str,
             "isExtra": True,
         }
 
@@ -287,7 +294,12 @@ class TaskDefinition:
     field_overrides: dict[str, dict[str, Any]]
     extra_fields: list[ExtraFieldDefinition]
 
-    def default_field_values(self) -> dict[str, Any]:
+    def default_field_values(self) -> Mapping[str, Any]:
+        return self._default_values
+
+    # Task definitions are immutable after catalog load, so derived views are built once per instance.
+    @cached_property
+    def _default_values(self) -> Mapping[str, Any]:
         defaults: dict[str, Any] = {}
         for field_name, patch in self.field_overrides.items():
             if isinstance(patch, dict) and "default" in patch:
@@ -295,7 +307,55 @@ class TaskDefinition:
         for field in self.extra_fields:
             if field.default is not None:
                 defaults[field.name] = field.default
-        return defaults
+        return MappingProxyType(defaults)
+
+    @property
+    def schema(self) -> dict[str, Any]:
+        # The cached schema outlives the request (catalogs are cached process-wide); callers get their own copy.
+        return copy.deepcopy(self._schema)
+
+    @cached_property
+    def _schema(self) -> dict[str, Any]:
+        base_schema = dataclass_schema(self.base_task_type)
+        field_map = {field["name"]: dict(field) for field in base_schema["fields"]}
+        for extra in self.extra_fields:
+            field_map[extra.name] = extra.to_schema_field()
+
+        for field_name, patch in self.field_overrides.items():
+            if field_name not in field_map:
+                continue
+            field_data = field_map[field_name]
+            for key in {"type", "required", "default", "label", "description", "group", "choices", "min", "max", "step"}:
+                if key in patch:
+                    field_data[key] = patch[key]
+
+        filtered_items = [
+            field
+            for name, field in field_map.items()
+            if name not in self.hidden_fields
+        ]
+
+        order_index = {name: idx for idx, name in enumerate(self.field_order)}
+        filtered_items.sort(key=lambda item: (order_index.get(item["name"], 10_000), item["name"]))
+
+        return {
+            "taskType": self.task_type,
+            "baseTaskType": self.base_task_type,
+            "title": self.title,
+            "description": self.description,
+            "runner": {
+                "startMethod": self.runner.start_method,
+                "target": self.runner.target,
+                "targetEnvVar": self.runner.target_env_var,
+            },
+            "mlflow": {
+                "metric": self.mlflow.metric,
+                "mode": self.mlflow.mode,
+                "modelName": self.mlflow.model_name,
+                "artifactPath": self.mlflow.artifact_path,
+            },
+            "fields": filtered_items,
+        }
 
 
 @dataclass(frozen=True)
@@ -388,6 +448,11 @@ def _parse_optional_number(value: Any, *, field_name: str) -> float | int | None
         raise ValueError(f"Invalid number for {field_name}: {value!r}") from error
 
 
+@lru_cache(maxsize=None)
+def _base_field_names(base_task_type: TaskType) -> frozenset[str]:
+    return frozenset(field["name"] for field in dataclass_schema(base_task_type)["fields"])
+
+
 def _parse_extra_fields(
     raw_task: dict[str, Any],
     *,
@@ -400,7 +465,7 @@ def _parse_extra_fields(
     if not isinstance(raw_extra, list):
         raise ValueError(f"{task_type}.extraFields must be a list")
 
-    base_field_names = {field["name"] for field in dataclass_schema(base_task_type)["fields"]}
+    base_field_names = _base_field_names(base_task_type)
     seen_names: set[str] = set()
     parsed: list[ExtraFieldDefinition] = []
 
@@ -758,13 +823,42 @@ def validate_catalog_payload(payload: dict[str, Any], *, source: str) -> TaskCat
     return TaskCatalog(tasks, registry_models, available_gpu_ids=available_gpu_ids)
 
 
+# Resolved path -> (st_mtime_ns, st_size, catalog); an entry is replaced once the file changes.
+_CATALOG_LOAD_CACHE: dict[str, tuple[int, int, TaskCatalog]] = {}
+
+
 class TaskCatalogService:
     def __init__(self, catalog_path: Path) -> None:
         self._catalog_path = catalog_path
+        self._payload: dict[str, Any] | None = None
+
+    @staticmethod
+    def clear_cache() -> None:
+        _CATALOG_LOAD_CACHE.clear()
+
+    @classmethod
+    def from_mapping(cls, data: dict[str, Any], *, source: str = "<mapping>") -> TaskCatalogService:
+        service = cls(Path(source))
+        service._payload = data
+        return service
 
     def load(self) -> TaskCatalog:
+        if self._payload is not None:
+            return validate_catalog_payload(self._payload, source=str(self._catalog_path))
+        try:
+            stat = self._catalog_path.stat()
+        except FileNotFoundError:
+            return validate_catalog_payload(default_catalog_payload(), source=str(self._catalog_path))
+
+        key = str(self._catalog_path.resolve())
+        cached = _CATALOG_LOAD_CACHE.get(key)
+        if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+
         payload = read_catalog_payload(self._catalog_path)
-        return validate_catalog_payload(payload, source=str(self._catalog_path))
+        catalog = validate_catalog_payload(payload, source=str(self._catalog_path))
+        _CATALOG_LOAD_CACHE[key] = (stat.st_mtime_ns, stat.st_size, catalog)
+        return catalog
 
 
 @lru_cache(maxsize=1)
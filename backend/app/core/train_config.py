@@ -180,6 +180,17 @@ class BaseTrainConfig:
             step=1,
         ),
     )
+    save_optimizer_every: int = field(
+        default=5,
+        metadata=ui_meta(
+            "Save Optimizer Every",
+            "몇 에폭마다 옵티마이저 상태를 체크포인트에 포함할지",
+            group="runtime",
+            min_value=1,
+            max_value=10000,
+            step=1,
+        ),
+    )
     mlflow_tracking_uri: str = field(
         default="http://127.0.0.1:5001",
         metadata=ui_meta(
@@ -45,8 +45,9 @@ def _walk_file_entries(root: Path) -> list[dict[str, Any]]:
 
 
 class FtpModelRegistry:
-    def __init__(self, root_dir: Path) -> None:
+    def __init__(self, root_dir: Path, *, bundle_compresslevel: int = 9) -> None:
         self._root_dir = root_dir.expanduser().resolve()
+        self._bundle_compresslevel = bundle_compresslevel
         self._lock = threading.Lock()
         self._root_dir.mkdir(parents=True, exist_ok=True)
         for stage in ("dev", "release"):
@@ -173,7 +174,7 @@ class FtpModelRegistry:
 
     def _bundle_payload(self, version_dir: Path, payload_dir: Path) -> str:
         bundle_path = version_dir / "bundle.tar.gz"
-        with tarfile.open(bundle_path, "w:gz") as tar:
+        with tarfile.open(bundle_path, "w:gz", compresslevel=self._bundle_compresslevel) as tar:
             tar.add(payload_dir, arcname="payload")
         return bundle_path.name
 
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import subprocess
 import sys
+import threading
 import uuid
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -11,7 +12,7 @@ import torch
 
 from app.core.settings import get_settings
 from app.services.process_utils import build_pythonpath_env, read_process_output, start_checked_process, stop_process
-from trainers.models import create_model
+from trainers.models import create_model, fuse_for_inference
 
 
 def _utc_now() -> str:
@@ -71,6 +72,7 @@ class LocalModelRecord:
 class ModelServingManager:
     def __init__(self) -> None:
         self._settings = get_settings()
+        self._lock = threading.Lock()
         self._ray_servers: dict[str, RayServeRecord] = {}
         self._local_models: dict[str, LocalModelRecord] = {}
 
@@ -132,31 +134,45 @@ class ModelServingManager:
             pid=process.pid,
             process=process,
         )
-        self._ray_servers[server_id] = record
+        with self._lock:
+            self._ray_servers[server_id] = record
         return record.to_public()
 
     def stop_ray_server(self, server_id: str) -> dict[str, Any]:
-        record = self._ray_servers.get(server_id)
+        with self._lock:
+            record = self._ray_servers.get(server_id)
         if record is None:
             raise KeyError(f"Ray Serve server not found: {server_id}")
 
         if record.process is not None and record.status == "running":
             stop_process(record.process, terminate_timeout_sec=8, kill_timeout_sec=3)
 
-        record.status = "stopped"
-        record.finished_at = _utc_now()
-        return record.to_public()
+        # Same lock as list_ray_servers, so a concurrent poll cannot relabel the stopped server as exited.
+        with self._lock:
+            record.status = "stopped"
+            record.finished_at = _utc_now()
+            return record.to_public()
 
     def list_ray_servers(self) -> list[dict[str, Any]]:
-        for record in self._ray_servers.values():
-            if record.process is not None and record.status == "running":
-                if record.process.poll() is not None:
-                    record.status = "exited"
-                    record.finished_at = record.finished_at or _utc_now()
-                    combined = read_process_output(record.process, max_chars=5000)
-                    if combined:
-                        record.last_error = combined
-        return [item.to_public() for item in self._ray_servers.values()]
+        with self._lock:
+            records = list(self._ray_servers.values())
+
+        # Poll and read output outside the lock; only status updates need it.
+        exited: list[tuple[RayServeRecord, str]] = []
+        for record in records:
+            if record.process is not None and record.status == "running" and record.process.poll() is not None:
+                exited.append((record, read_process_output(record.process, max_chars=5000)))
+
+        with self._lock:
+            finished_at = _utc_now() if exited else None
+            for record, combined in exited:
+                if record.status != "running":
+                    continue
+                record.status = "exited"
+                record.finished_at = record.finished_at or finished_at
+                if combined:
+                    record.last_error = combined
+            return [item.to_public() for item in records]
 
     def load_local_model(
         self,
@@ -177,6 +193,7 @@ class ModelServingManager:
             inferred_classes = int(num_classes or checkpoint.get("num_classes", 2))
             model = create_model(inferred_task, inferred_classes)
             model.load_state_dict(checkpoint["model_state_dict"])
+            fuse_for_inference(model)
         else:
             raise ValueError(
                 "Unsupported checkpoint format. Expected nn.Module or dict with model_state_dict."
@@ -205,7 +205,7 @@ class RunManager:
                     f"Invalid value for extra field '{field.name}': {coerced!r}. choices={field.choices}"
                 )
 
-            cli_args.extend([field.cli_flag(), self._serialize_cli_value(coerced)])
+            cli_args.extend([field.cli_flag_str, self._serialize_cli_value(coerced)])
             resolved[field.name] = coerced
 
         return cli_args, resolved
@@ -8,7 +8,7 @@ from dataclasses import dataclass
 from ftplib import FTP
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Any, Literal
+from typing import Any, Callable, Literal
 
 import torch
 
@@ -76,12 +76,16 @@ class DownloadedModelBundle:
 
 
 class FtpModelRegistryClient:
-    def __init__(self, config: FtpModelClientConfig) -> None:
+    def __init__(self, config: FtpModelClientConfig, *, connect: Callable[[], FTP] | None = None) -> None:
         self._config = config
         self._cache_root = config.resolved_cache_root
         self._cache_root.mkdir(parents=True, exist_ok=True)
+        # Optional transport factory; anything exposing FTP's size/retrbinary + context manager works.
+        self._connect_override = connect
 
     def _connect(self) -> FTP:
+        if self._connect_override is not None:
+            return self._connect_override()
         ftp = FTP()
         ftp.connect(host=self._config.host, port=self._config.port, timeout=self._config.timeout_sec)
         ftp.login(user=self._config.username, passwd=self._config.password)
@@ -129,7 +133,8 @@ class FtpModelRegistryClient:
         extracted_payload = payload_root / "payload"
         return extracted_payload if extracted_payload.exists() else payload_root
 
-    def _preferred_weight_path(self, payload_dir: Path) -> Path | None:
+    @staticmethod
+    def _preferred_weight_path(payload_dir: Path) -> Path | None:
         preferred_names = [
             "model-standard.pt",
             "best_checkpoint.pth",
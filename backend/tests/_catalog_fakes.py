@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import app.api.routes as routes
+from app.core.catalog_repository import CatalogRevision
+from app.core.task_catalog import validate_catalog_payload
+
+# Fixed revision timestamp; no test depends on created_at ordering.
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def fingerprint(data: bytes) -> str:
+    # Content fingerprint for no-op save detection only; not a cryptographic checksum.
+    return hashlib.sha1(data).hexdigest()
+
+
+class FakeCatalogRepository:
+    def __init__(self) -> None:
+        self._revisions: list[CatalogRevision] = []
+        self._next_id = 1
+
+    def _new_revision(self, content: str, source: str) -> CatalogRevision:
+        normalized = content if content.endswith("\n") else f"{content}\n"
+        revision = CatalogRevision(
+            revision_id=self._next_id,
+            content=normalized,
+            source=source,
+            created_at=EPOCH,
+            checksum=fingerprint(normalized.encode("utf-8")),
+        )
+        self._next_id += 1
+        return revision
+
+    def seed_if_empty(self, *, seed_file_path: Path, default_content: str) -> CatalogRevision:
+        if self._revisions:
+            return self._revisions[-1]
+        content = seed_file_path.read_text(encoding="utf-8") if seed_file_path.exists() else default_content
+        revision = self._new_revision(content, "bootstrap:file" if seed_file_path.exists() else "bootstrap:default")
+        self._revisions.append(revision)
+        return revision
+
+    def latest(self) -> CatalogRevision | None:
+        return self._revisions[-1] if self._revisions else None
+
+    def list_revisions(self, *, limit: int = 30) -> list[CatalogRevision]:
+        return list(reversed(self._revisions[-max(1, limit) :]))
+
+    def save(self, content: str, *, source: str) -> CatalogRevision:
+        normalized = content if content.endswith("\n") else f"{content}\n"
+        checksum = fingerprint(normalized.encode("utf-8"))
+        latest = self.latest()
+        if latest and latest.checksum == checksum:
+            return latest
+        revision = self._new_revision(normalized, source)
+        self._revisions.append(revision)
+        return revision
+
+    def get(self, revision_id: int) -> CatalogRevision | None:
+        for revision in self._revisions:
+            if revision.revision_id == revision_id:
+                return revision
+        return None
+
+    def restore(self, revision_id: int) -> CatalogRevision:
+        revision = self.get(revision_id)
+        if revision is None:
+            raise KeyError(f"Catalog revision not found: {revision_id}")
+        return self.save(revision.content, source=f"restore:{revision_id}")
+
+
+class FakeCatalogGetter:
+    def __init__(self, repository: FakeCatalogRepository) -> None:
+        self.repository = repository
+        self.cleared = False
+        self.called = False
+
+    def cache_clear(self) -> None:
+        self.cleared = True
+
+    def __call__(self) -> Any:
+        self.called = True
+        latest = self.repository.latest()
+        if latest is None:
+            raise AssertionError("No seeded catalog")
+        parsed = routes.parse_catalog_yaml(latest.content, source="fake-repo")
+        return validate_catalog_payload(parsed, source="fake-repo")
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import os
+import tempfile
+
+_RAM_TEMP_DIR = "/dev/shm"
+_saved_tempdirs: list[str | None] = []
+
+
+def use_ram_tempdir() -> None:
+    # Point tempfile at tmpfs when available so scratch registries/checkpoints skip the disk.
+    _saved_tempdirs.append(tempfile.tempdir)
+    if os.path.isdir(_RAM_TEMP_DIR) and os.access(_RAM_TEMP_DIR, os.W_OK):
+        tempfile.tempdir = _RAM_TEMP_DIR
+
+
+def restore_tempdir() -> None:
+    tempfile.tempdir = _saved_tempdirs.pop()
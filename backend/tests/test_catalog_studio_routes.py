@@ -1,10 +1,8 @@
 from __future__ import annotations
 
-import hashlib
 import tempfile
 import textwrap
 import unittest
-from datetime import datetime, timezone
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
@@ -17,114 +15,59 @@ from app.api.schemas import (
     CatalogStudioTaskItem,
     SaveCatalogStudioRequest,
 )
-from app.core.catalog_repository import CatalogRevision
 from app.core.task_catalog import validate_catalog_payload
-
-
-class _FakeCatalogRepository:
-    def __init__(self) -> None:
-        self._revisions: list[CatalogRevision] = []
-        self._next_id = 1
-
-    def _new_revision(self, content: str, source: str) -> CatalogRevision:
-        normalized = content if content.endswith("\n") else f"{content}\n"
-        revision = CatalogRevision(
-            revision_id=self._next_id,
-            content=normalized,
-            source=source,
-            created_at=datetime.now(tz=timezone.utc),
-            checksum=hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
-        )
-        self._next_id += 1
-        return revision
-
-    def seed_if_empty(self, *, seed_file_path: Path, default_content: str) -> CatalogRevision:
-        if self._revisions:
-            return self._revisions[-1]
-        content = seed_file_path.read_text(encoding="utf-8") if seed_file_path.exists() else default_content
-        revision = self._new_revision(content, "bootstrap:file" if seed_file_path.exists() else "bootstrap:default")
-        self._revisions.append(revision)
-        return revision
-
-    def latest(self) -> CatalogRevision | None:
-        return self._revisions[-1] if self._revisions else None
-
-    def save(self, content: str, *, source: str) -> CatalogRevision:
-        normalized = content if content.endswith("\n") else f"{content}\n"
-        checksum = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
-        latest = self.latest()
-        if latest and latest.checksum == checksum:
-            return latest
-        revision = self._new_revision(normalized, source)
-        self._revisions.append(revision)
-        return revision
-
-
-class _FakeCatalogGetter:
-    def __init__(self, repository: _FakeCatalogRepository) -> None:
-        self.repository = repository
-        self.cleared = False
-        self.called = False
-
-    def cache_clear(self) -> None:
-        self.cleared = True
-
-    def __call__(self):
-        self.called = True
-        latest = self.repository.latest()
-        if latest is None:
-            raise AssertionError("No seeded catalog")
-        parsed = routes.parse_catalog_yaml(latest.content, source="fake-repo")
-        return validate_catalog_payload(parsed, source="fake-repo")
+from tests._catalog_fakes import FakeCatalogGetter, FakeCatalogRepository
+
+
+_CLASSIFICATION_CATALOG_YAML = textwrap.dedent(
+    """
+    tasks:
+      - taskType: classification
+        enabled: true
+        title: Classification
+        description: Image classification trainer
+        baseTaskType: classification
+        runner:
+          startMethod: python_script
+          target: backend/trainers/train_classification.py
+        mlflow:
+          metric: val_accuracy
+          mode: max
+          modelName: classification-best-model
+          artifactPath: model
+        extraFields:
+          - name: train_profile
+            valueType: str
+            type: select
+            default: fast
+            choices: [fast, full]
+    registryModels:
+      - id: classification
+        title: Classification Model
+        taskType: classification
+        modelName: classification-best-model
+        defaultStage: release
+        defaultVersion: latest
+        defaultDestinationDir: ./backend/artifacts/downloads
+    """
+).strip() + "\n"
+
+
+def setUpModule() -> None:
+    # Warm parser/validator caches so per-test timings reflect steady state.
+    validate_catalog_payload(routes.parse_catalog_yaml(_CLASSIFICATION_CATALOG_YAML, source="warmup"), source="warmup")
 
 
 class CatalogStudioRoutesTest(unittest.TestCase):
     def test_get_catalog_studio(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="catalog-studio-routes-") as temp_dir:
-            catalog_path = Path(temp_dir) / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    """
-                    tasks:
-                      - taskType: classification
-                        enabled: true
-                        title: Classification
-                        description: Image classification trainer
-                        baseTaskType: classification
-                        runner:
-                          startMethod: python_script
-                          target: backend/trainers/train_classification.py
-                        mlflow:
-                          metric: val_accuracy
-                          mode: max
-                          modelName: classification-best-model
-                          artifactPath: model
-                        extraFields:
-                          - name: train_profile
-                            valueType: str
-                            type: select
-                            default: fast
-                            choices: [fast, full]
-                    registryModels:
-                      - id: classification
-                        title: Classification Model
-                        taskType: classification
-                        modelName: classification-best-model
-                        defaultStage: release
-                        defaultVersion: latest
-                        defaultDestinationDir: ./backend/artifacts/downloads
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
-            )
-            fake_repo = _FakeCatalogRepository()
+        fake_repo = FakeCatalogRepository()
+        fake_repo.save(_CLASSIFICATION_CATALOG_YAML, source="test")
 
-            with (
-                patch.object(routes, "settings", SimpleNamespace(training_catalog_path=catalog_path)),
-                patch.object(routes, "get_catalog_repository", return_value=fake_repo),
-            ):
-                payload = routes.get_catalog_studio()
+        with (
+            patch.object(routes, "settings", SimpleNamespace(training_catalog_path=Path("unused.yaml"))),
+            patch.object(routes, "get_catalog_repository", return_value=fake_repo),
+        ):
+            payload = routes.get_catalog_studio()
 
         self.assertEqual(payload["taskCount"], 1)
         self.assertEqual(payload["registryModelCount"], 1)
@@ -184,8 +127,8 @@ class CatalogStudioRoutesTest(unittest.TestCase):
                 ],
                 createBackup=True,
             )
-            fake_repo = _FakeCatalogRepository()
-            fake_getter = _FakeCatalogGetter(fake_repo)
+            fake_repo = FakeCatalogRepository()
+            fake_getter = FakeCatalogGetter(fake_repo)
 
             with (
                 patch.object(routes, "settings", SimpleNamespace(training_catalog_path=catalog_path)),
@@ -3,7 +3,11 @@ from __future__ import annotations
 import tempfile
 import unittest
 from pathlib import Path
+from typing import Any, Callable
 
+import torch
+
+from app.services.ftp_model_registry import FtpModelRegistry
 from scripts.ftp_model_client import (
     FtpModelClientConfig,
     FtpModelRegistryClient,
@@ -11,6 +15,32 @@ from scripts.ftp_model_client import (
 )
 
 
+class _LocalFtpTransport:
+    """In-process stand-in for ftplib.FTP that serves files from a registry root."""
+
+    def __init__(self, root: Path) -> None:
+        self._root = root
+
+    def __enter__(self) -> "_LocalFtpTransport":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        return None
+
+    def _local_path(self, remote_path: str) -> Path:
+        return self._root / remote_path.lstrip("/")
+
+    def size(self, remote_path: str) -> int | None:
+        return self._local_path(remote_path).stat().st_size
+
+    def retrbinary(self, cmd: str, callback: Callable[[bytes], Any], blocksize: int = 8192) -> str:
+        remote_path = cmd.split(" ", 1)[1]
+        with self._local_path(remote_path).open("rb") as stream:
+            while chunk := stream.read(blocksize):
+                callback(chunk)
+        return "226 Transfer complete"
+
+
 class FtpModelClientTest(unittest.TestCase):
     def test_singleton_returns_same_instance_for_same_config(self) -> None:
         with tempfile.TemporaryDirectory(prefix="ftp-client-cache-") as temp_dir:
@@ -41,14 +71,40 @@ class FtpModelClientTest(unittest.TestCase):
             (payload / "best_checkpoint.pt").write_bytes(b"b")
             (payload / "model-standard.pt").write_bytes(b"c")
 
+            preferred = FtpModelRegistryClient._preferred_weight_path(payload)  # noqa: SLF001
+            self.assertEqual(preferred, payload / "model-standard.pt")
+
+    def test_get_downloads_bundle_through_injected_transport(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="ftp-client-transport-") as temp_dir:
+            root = Path(temp_dir)
+            source_dir = root / "source"
+            source_dir.mkdir(parents=True, exist_ok=True)
+            checkpoint_path = source_dir / "best_checkpoint.pth"
+            torch.save({"model_state_dict": {"head.weight": torch.zeros(2, 4)}}, checkpoint_path)
+
+            registry = FtpModelRegistry(root / "registry", bundle_compresslevel=0)
+            registry.publish_from_local(
+                model_name="Transport Model",
+                stage="release",
+                local_source_path=str(checkpoint_path),
+                version="v0001",
+                set_latest=True,
+                notes=None,
+                source_metadata={"type": "local"},
+                convert_to_torch_standard=True,
+                torch_task_type="classification",
+                torch_num_classes=2,
+            )
+
             client = FtpModelRegistryClient(
-                FtpModelClientConfig(
-                    host="127.0.0.1",
-                    cache_root=temp_dir,
-                )
+                FtpModelClientConfig(host="127.0.0.1", cache_root=str(root / "client-cache")),
+                connect=lambda: _LocalFtpTransport(registry.root_dir),  # type: ignore[arg-type, return-value]
             )
-            preferred = client._preferred_weight_path(payload)  # noqa: SLF001
-            self.assertEqual(preferred, payload / "model-standard.pt")
+            bundle = client.get("release", "Transport Model", "latest")
+
+            self.assertEqual(bundle.resolved_version, "v0001")
+            self.assertEqual(bundle.source.get("type"), "local")
+            self.assertEqual(bundle.preferred_weight_path, bundle.extracted_payload_dir / "model-standard.pt")
 
 
 if __name__ == "__main__":
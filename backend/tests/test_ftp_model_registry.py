@@ -1,30 +1,62 @@
 from __future__ import annotations
 
+import io
 import json
 import tarfile
 import tempfile
 import unittest
+import uuid
 from pathlib import Path
 from unittest.mock import patch
 
 import torch
 
 from app.services.ftp_model_registry import FtpModelRegistry
+from tests._scratch import restore_tempdir, use_ram_tempdir
+
+_LABELS_BYTES = json.dumps({"0": "cat", "1": "dog"}).encode("utf-8")
+
+
+def setUpModule() -> None:
+    use_ram_tempdir()
+
+
+def tearDownModule() -> None:
+    restore_tempdir()
 
 
 class FtpModelRegistryTest(unittest.TestCase):
-    def setUp(self) -> None:
-        self.temp_dir = tempfile.TemporaryDirectory(prefix="ftp-registry-test-")
-        self.root = Path(self.temp_dir.name)
-        self.registry = FtpModelRegistry(self.root / "registry")
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._shared_temp_dir = tempfile.TemporaryDirectory(prefix=f"ftp-registry-{uuid.uuid4().hex[:6]}-")
+        cls._shared_root = Path(cls._shared_temp_dir.name)
+
+        # Read-only publish source shared by every test; registries copy it into their own roots.
+        cls._shared_source = cls._shared_root / "source"
+        cls._shared_source.mkdir(parents=True, exist_ok=True)
+        (cls._shared_source / "model.pt").write_bytes(b"fake-model")
+        (cls._shared_source / "labels.json").write_bytes(_LABELS_BYTES)
+
+        buffer = io.BytesIO()
+        torch.save(
+            {
+                "task_type": "classification",
+                "num_classes": 3,
+                "model_state_dict": {"head.weight": torch.zeros(3, 4)},
+            },
+            buffer,
+            _use_new_zipfile_serialization=False,
+        )
+        cls._pth_bytes = buffer.getvalue()
 
-        self.source = self.root / "source"
-        self.source.mkdir(parents=True, exist_ok=True)
-        (self.source / "model.pt").write_bytes(b"fake-model")
-        (self.source / "labels.json").write_text(json.dumps({"0": "cat", "1": "dog"}), encoding="utf-8")
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._shared_temp_dir.cleanup()
 
-    def tearDown(self) -> None:
-        self.temp_dir.cleanup()
+    def setUp(self) -> None:
+        self.root = Path(tempfile.mkdtemp(dir=self._shared_root))
+        self.registry = FtpModelRegistry(self.root / "registry", bundle_compresslevel=0)
+        self.source = self._shared_source
 
     def test_publish_local_and_resolve_latest(self) -> None:
         published = self.registry.publish_from_local(
@@ -47,9 +79,9 @@ class FtpModelRegistryTest(unittest.TestCase):
         self.assertTrue(bundle_path.exists())
 
         with tarfile.open(bundle_path, "r:gz") as archive:
-            names = archive.getnames()
-            self.assertIn("payload/model.pt", names)
-            self.assertIn("payload/labels.json", names)
+            # getmember raises KeyError when the member is missing.
+            archive.getmember("payload/model.pt")
+            archive.getmember("payload/labels.json")
 
     def test_promote_dev_to_release(self) -> None:
         self.registry.publish_from_local(
@@ -120,13 +152,8 @@ class FtpModelRegistryTest(unittest.TestCase):
         pth_source = self.root / "weights"
         pth_source.mkdir(parents=True, exist_ok=True)
 
-        checkpoint = {
-            "task_type": "classification",
-            "num_classes": 3,
-            "model_state_dict": {"head.weight": torch.randn(3, 4)},
-        }
         source_file = pth_source / "best_checkpoint.pth"
-        torch.save(checkpoint, source_file)
+        source_file.write_bytes(self._pth_bytes)
 
         published = self.registry.publish_from_local(
             model_name="PTH Model",
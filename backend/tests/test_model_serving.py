@@ -2,45 +2,62 @@ from __future__ import annotations
 
 import tempfile
 import unittest
+from collections import namedtuple
 from pathlib import Path
 from types import SimpleNamespace
 from unittest.mock import patch
 
 import app.services.model_serving as model_serving
+from tests._scratch import restore_tempdir, use_ram_tempdir
 
 
-class _FakeProcess:
-    def __init__(self, pid: int, poll_code: int | None = None) -> None:
-        self.pid = pid
-        self._poll_code = poll_code
+def setUpModule() -> None:
+    use_ram_tempdir()
 
-    def poll(self) -> int | None:
-        return self._poll_code
+
+def tearDownModule() -> None:
+    restore_tempdir()
+
+
+_FakeProcess = namedtuple("_FakeProcess", ["pid", "poll"])
 
 
 class ModelServingManagerTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._temp_dir = tempfile.TemporaryDirectory(prefix="ray-serve-test-")
+        cls._project_root = Path(cls._temp_dir.name)
+        scripts_dir = cls._project_root / "backend" / "scripts"
+        scripts_dir.mkdir(parents=True, exist_ok=True)
+        (scripts_dir / "run_ray_serve.py").write_text("# stub", encoding="utf-8")
+
+        cls._settings_patcher = patch.object(
+            model_serving,
+            "get_settings",
+            return_value=SimpleNamespace(backend_root=cls._project_root / "backend", project_root=cls._project_root),
+        )
+        cls._settings_patcher.start()
+        cls.manager = model_serving.ModelServingManager()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls._settings_patcher.stop()
+        cls._temp_dir.cleanup()
+
+    def setUp(self) -> None:
+        self.manager._ray_servers.clear()
+
     def test_start_ray_server_builds_command(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="ray-serve-test-") as temp_dir:
-            backend_root = Path(temp_dir) / "backend"
-            scripts_dir = backend_root / "scripts"
-            scripts_dir.mkdir(parents=True, exist_ok=True)
-            (scripts_dir / "run_ray_serve.py").write_text("# stub", encoding="utf-8")
-
-            fake_settings = SimpleNamespace(backend_root=backend_root, project_root=Path(temp_dir))
-            fake_process = _FakeProcess(pid=43210)
-
-            with (
-                patch.object(model_serving, "get_settings", return_value=fake_settings),
-                patch.object(model_serving, "start_checked_process", return_value=fake_process) as mocked_start,
-            ):
-                manager = model_serving.ModelServingManager()
-                result = manager.start_ray_server(
-                    model_uri="models:/classification-best-model/1",
-                    host="0.0.0.0",
-                    port=7001,
-                    app_name="demo-app",
-                    route_prefix="predict",
-                )
+        fake_process = _FakeProcess(pid=43210, poll=lambda: None)
+
+        with patch.object(model_serving, "start_checked_process", return_value=fake_process) as mocked_start:
+            result = self.manager.start_ray_server(
+                model_uri="models:/classification-best-model/1",
+                host="0.0.0.0",
+                port=7001,
+                app_name="demo-app",
+                route_prefix="predict",
+            )
 
         self.assertEqual(result["status"], "running")
         self.assertEqual(result["appName"], "demo-app")
@@ -57,15 +74,11 @@ class ModelServingManagerTest(unittest.TestCase):
 
         env = call_args.kwargs["env"]
         self.assertIn("PYTHONPATH", env)
-        self.assertTrue(env["PYTHONPATH"].startswith(str(Path(temp_dir) / "backend")))
+        self.assertTrue(env["PYTHONPATH"].startswith(str(self._project_root / "backend")))
 
     def test_stop_ray_server_updates_status(self) -> None:
-        fake_settings = SimpleNamespace(backend_root=Path("/tmp/backend"), project_root=Path("/tmp"))
-        fake_process = _FakeProcess(pid=1000)
-        with patch.object(model_serving, "get_settings", return_value=fake_settings):
-            manager = model_serving.ModelServingManager()
-
-        manager._ray_servers["server-1"] = model_serving.RayServeRecord(
+        fake_process = _FakeProcess(pid=1000, poll=lambda: None)
+        self.manager._ray_servers["server-1"] = model_serving.RayServeRecord(
             server_id="server-1",
             model_uri="models:/m/1",
             host="127.0.0.1",
@@ -77,19 +90,15 @@ class ModelServingManagerTest(unittest.TestCase):
         )
 
         with patch.object(model_serving, "stop_process") as mocked_stop:
-            payload = manager.stop_ray_server("server-1")
+            payload = self.manager.stop_ray_server("server-1")
 
         self.assertEqual(payload["status"], "stopped")
         self.assertIsNotNone(payload["finishedAt"])
         mocked_stop.assert_called_once()
 
     def test_list_ray_server_marks_exited(self) -> None:
-        fake_settings = SimpleNamespace(backend_root=Path("/tmp/backend"), project_root=Path("/tmp"))
-        exited_process = _FakeProcess(pid=2000, poll_code=1)
-        with patch.object(model_serving, "get_settings", return_value=fake_settings):
-            manager = model_serving.ModelServingManager()
-
-        manager._ray_servers["server-2"] = model_serving.RayServeRecord(
+        exited_process = _FakeProcess(pid=2000, poll=lambda: 1)
+        self.manager._ray_servers["server-2"] = model_serving.RayServeRecord(
             server_id="server-2",
             model_uri="models:/m/2",
             host="127.0.0.1",
@@ -101,12 +110,56 @@ class ModelServingManagerTest(unittest.TestCase):
         )
 
         with patch.object(model_serving, "read_process_output", return_value="ray crashed"):
-            items = manager.list_ray_servers()
+            items = self.manager.list_ray_servers()
 
         self.assertEqual(len(items), 1)
         self.assertEqual(items[0]["status"], "exited")
         self.assertEqual(items[0]["lastError"], "ray crashed")
 
+    def _add_running_record(self, server_id: str, process: _FakeProcess) -> None:
+        self.manager._ray_servers[server_id] = model_serving.RayServeRecord(
+            server_id=server_id,
+            model_uri="models:/m/3",
+            host="127.0.0.1",
+            port=7030,
+            app_name="void-train-manager",
+            route_prefix="/",
+            started_at="2026-02-26T00:00:00+00:00",
+            process=process,
+        )
+
+    def test_stop_during_list_poll_keeps_stopped_status(self) -> None:
+        # The process has exited (stop terminated it) by the time list_ray_servers polls it.
+        self._add_running_record("server-3", _FakeProcess(pid=3000, poll=lambda: -15))
+
+        def stop_while_listing(*_args: object, **_kwargs: object) -> str:
+            self.manager.stop_ray_server("server-3")
+            return ""
+
+        with (
+            patch.object(model_serving, "stop_process"),
+            patch.object(model_serving, "read_process_output", side_effect=stop_while_listing),
+        ):
+            items = self.manager.list_ray_servers()
+
+        self.assertEqual(items[0]["status"], "stopped")
+        self.assertEqual(self.manager.list_ray_servers()[0]["status"], "stopped")
+
+    def test_list_during_stop_ends_stopped(self) -> None:
+        self._add_running_record("server-4", _FakeProcess(pid=4000, poll=lambda: -15))
+
+        def list_while_stopping(*_args: object, **_kwargs: object) -> None:
+            self.manager.list_ray_servers()
+
+        with (
+            patch.object(model_serving, "stop_process", side_effect=list_while_stopping),
+            patch.object(model_serving, "read_process_output", return_value=""),
+        ):
+            payload = self.manager.stop_ray_server("server-4")
+
+        self.assertEqual(payload["status"], "stopped")
+        self.assertEqual(self.manager.list_ray_servers()[0]["status"], "stopped")
+
 
 if __name__ == "__main__":
     unittest.main()
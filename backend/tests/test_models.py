@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import io
+import unittest
+
+import torch
+from torch import nn
+
+from trainers.models import create_model, fuse_for_inference, quantize_int8
+
+
+class CreateModelTest(unittest.TestCase):
+    def test_fused_inference_matches_eager_model(self) -> None:
+        torch.manual_seed(0)
+        inputs = torch.randn(2, 1, 16, 16)
+        for task_type in ("classification", "segmentation"):
+            with self.subTest(task_type=task_type):
+                reference = create_model(task_type, 3).eval()
+                fused = create_model(task_type, 3)
+                fused.load_state_dict(reference.state_dict())
+                fuse_for_inference(fused)
+
+                with torch.no_grad():
+                    torch.testing.assert_close(fused(inputs), reference(inputs))
+                self.assertFalse(fused.training)
+
+    def test_eval_mode_returns_fused_model(self) -> None:
+        model = create_model("classification", 3, eval_mode=True)
+        self.assertIsInstance(model.net[0], torch.ao.nn.intrinsic.ConvReLU2d)
+        self.assertFalse(model.training)
+
+    def test_classifier_matches_legacy_pooled_sequential(self) -> None:
+        torch.manual_seed(0)
+        legacy = nn.Sequential(
+            nn.Conv2d(1, 16, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.Conv2d(16, 32, kernel_size=3, padding=1),
+            nn.ReLU(inplace=True),
+            nn.AdaptiveAvgPool2d((1, 1)),
+            nn.Flatten(),
+            nn.Linear(32, 3),
+        ).eval()
+        model = create_model("classification", 3).eval()
+        model.load_state_dict({f"net.{key}": value for key, value in legacy.state_dict().items()})
+
+        inputs = torch.randn(2, 1, 16, 16)
+        with torch.no_grad():
+            torch.testing.assert_close(model(inputs), legacy(inputs))
+
+    def test_loads_pickled_module_with_pooling_layers(self) -> None:
+        torch.manual_seed(0)
+        legacy = create_model("classification", 3).eval()
+        legacy.net[4] = nn.AdaptiveAvgPool2d((1, 1))
+        legacy.net[5] = nn.Flatten()
+        buffer = io.BytesIO()
+        torch.save(legacy, buffer)
+        buffer.seek(0)
+
+        loaded = torch.load(buffer, map_location="cpu", weights_only=False)
+        current = create_model("classification", 3)
+        current.load_state_dict(loaded.state_dict())
+        fuse_for_inference(current)
+
+        inputs = torch.randn(2, 1, 16, 16)
+        with torch.no_grad():
+            torch.testing.assert_close(fuse_for_inference(loaded)(inputs), legacy(inputs))
+            torch.testing.assert_close(current(inputs), legacy(inputs))
+
+    def test_int8_quantization_tracks_float_model(self) -> None:
+        torch.manual_seed(0)
+        calibration = [torch.randn(4, 1, 16, 16) for _ in range(4)]
+        for task_type in ("classification", "segmentation"):
+            with self.subTest(task_type=task_type):
+                reference = create_model(task_type, 3).eval()
+                float_copy = create_model(task_type, 3)
+                float_copy.load_state_dict(reference.state_dict())
+                quantized = quantize_int8(float_copy, calibration)
+
+                with torch.no_grad():
+                    expected = reference(calibration[0])
+                    actual = quantized(calibration[0])
+                self.assertEqual(actual.dtype, torch.float32)
+                torch.testing.assert_close(actual, expected, atol=0.05, rtol=0.0)
+
+    def test_int8_quantization_requires_calibration_inputs(self) -> None:
+        with self.assertRaises(ValueError):
+            create_model("classification", 3, quantize="int8")
+
+
+if __name__ == "__main__":
+    unittest.main()
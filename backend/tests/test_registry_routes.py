@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import tempfile
-import textwrap
 import unittest
+from contextlib import ExitStack
 from pathlib import Path
-from types import SimpleNamespace
-from typing import Any
-from unittest.mock import patch
+from types import MappingProxyType, SimpleNamespace
+from typing import Any, cast
+from unittest.mock import DEFAULT, MagicMock, patch
 import io
 
 import app.api.routes as routes
@@ -17,46 +16,133 @@ from app.api.schemas import (
     StopRayServingRequest,
 )
 from app.core.task_catalog import TaskCatalogService
+from app.services.ftp_model_registry import FtpModelRegistry
 from fastapi import UploadFile
+from tests._scratch import restore_tempdir, use_ram_tempdir
+
+
+def setUpModule() -> None:
+    use_ram_tempdir()
+
+
+def tearDownModule() -> None:
+    restore_tempdir()
+
+
+_FAKE_SETTINGS = SimpleNamespace(
+    default_mlflow_tracking_uri="http://127.0.0.1:5001",
+    default_mlflow_experiment="void-train-manager",
+    ftp_default_host="0.0.0.0",
+    ftp_default_port=2121,
+    ftp_default_username="mlops",
+    ftp_default_password="mlops123!",
+)
+
+# Read-only view; download routes only read from the resolved payload.
+_RESOLVED_PAYLOAD = MappingProxyType(
+    {
+        "resolvedVersion": "v0003",
+        "bundlePath": "/release/classification-best-model/versions/v0003/bundle.tar.gz",
+        "manifestPath": "/release/classification-best-model/versions/v0003/manifest.json",
+        "entry": {},
+    }
+)
+
+_REGISTRY_CATALOG_PAYLOAD: dict[str, Any] = {
+    "tasks": [
+        {
+            "taskType": "classification",
+            "title": "Classification",
+            "baseTaskType": "classification",
+            "runner": {"target": "backend/trainers/train_classification.py"},
+        }
+    ],
+    "registryModels": [
+        {
+            "id": "classification",
+            "title": "Classification Model",
+            "taskType": "classification",
+            "modelName": "classification-best-model",
+            "defaultStage": "release",
+            "defaultVersion": "latest",
+            "defaultDestinationDir": "./backend/artifacts/downloads",
+        }
+    ],
+}
+
+_MLFLOW_CATALOG_PAYLOAD: dict[str, Any] = {
+    "tasks": [
+        {
+            "taskType": "classification",
+            "title": "Classification",
+            "baseTaskType": "classification",
+            "runner": {"target": "backend/trainers/train_classification.py"},
+            "mlflow": {
+                "metric": "val_accuracy",
+                "mode": "max",
+                "modelName": "classification-best-model",
+                "artifactPath": "model",
+            },
+        }
+    ],
+}
 
 
 class _FakeCatalogGetter:
-    def __init__(self, catalog_path: Path) -> None:
-        self.catalog_path = catalog_path
+    def __init__(self, catalog_payload: dict[str, Any]) -> None:
+        self.catalog_payload = catalog_payload
+        self._cached: Any | None = None
 
-    def cache_clear(self) -> None:  # pragma: no cover - compatibility only
-        return None
+    def cache_clear(self) -> None:
+        self._cached = None
 
     def __call__(self) -> Any:
-        return TaskCatalogService(self.catalog_path).load()
+        if self._cached is None:
+            self._cached = TaskCatalogService.from_mapping(self.catalog_payload, source="test").load()
+        return self._cached
+
+
+def _fake_get_model(stage: str, model_name: str) -> dict[str, Any]:
+    if model_name == "classification-best-model" and stage == "release":
+        return {
+            "modelName": model_name,
+            "stage": stage,
+            "latest": "v0002",
+            "updatedAt": "2026-02-25T12:00:00+00:00",
+            "versions": [
+                {
+                    "version": "v0002",
+                    "createdAt": "2026-02-25T12:00:00+00:00",
+                    "notes": "release",
+                    "bundle": "/release/classification-best-model/versions/v0002/bundle.tar.gz",
+                    "manifest": "/release/classification-best-model/versions/v0002/manifest.json",
+                    "source": {"type": "mlflow"},
+                }
+            ],
+        }
+    raise FileNotFoundError("not found")
 
 
-class _FakeFtpRegistry:
-    def get_model(self, stage: str, model_name: str) -> dict[str, Any]:
-        if model_name == "classification-best-model" and stage == "release":
-            return {
-                "modelName": model_name,
-                "stage": stage,
-                "latest": "v0002",
-                "updatedAt": "2026-02-25T12:00:00+00:00",
-                "versions": [
-                    {
-                        "version": "v0002",
-                        "createdAt": "2026-02-25T12:00:00+00:00",
-                        "notes": "release",
-                        "bundle": "/release/classification-best-model/versions/v0002/bundle.tar.gz",
-                        "manifest": "/release/classification-best-model/versions/v0002/manifest.json",
-                        "source": {"type": "mlflow"},
-                    }
-                ],
-            }
-        raise FileNotFoundError("not found")
+_FAKE_FTP_REGISTRY = MagicMock(spec=FtpModelRegistry)
+_FAKE_FTP_REGISTRY.get_model.side_effect = _fake_get_model
 
 
 class RegistryRoutesTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._settings_patcher = patch.object(routes, "settings", _FAKE_SETTINGS)
+
+    def setUp(self) -> None:
+        self._exit_stack = ExitStack()
+        self.addCleanup(self._exit_stack.close)
+        self._exit_stack.enter_context(self._settings_patcher)
+        _FAKE_FTP_REGISTRY.reset_mock()
+
+    def _patch(self, name: str, new: Any = DEFAULT, **kwargs: Any) -> Any:
+        return self._exit_stack.enter_context(patch.object(routes, name, new, **kwargs))
+
     def test_start_ray_serving(self) -> None:
-        with patch.object(
-            routes,
+        self._patch(
             "serving_manager",
             SimpleNamespace(
                 start_ray_server=lambda **kwargs: {
@@ -67,16 +153,16 @@ class RegistryRoutesTest(unittest.TestCase):
                     "routePrefix": kwargs["route_prefix"],
                 }
             ),
-        ):
-            payload = routes.start_ray_serving(
-                StartRayServingRequest(
-                    modelUri="models:/classification-best-model/1",
-                    host="0.0.0.0",
-                    port=7001,
-                    appName="vtm-ray",
-                    routePrefix="/",
-                )
+        )
+        payload = routes.start_ray_serving(
+            StartRayServingRequest(
+                modelUri="models:/classification-best-model/1",
+                host="0.0.0.0",
+                port=7001,
+                appName="vtm-ray",
+                routePrefix="/",
             )
+        )
 
         self.assertEqual(payload["serverId"], "ray-1")
         self.assertEqual(payload["status"], "running")
@@ -84,81 +170,43 @@ class RegistryRoutesTest(unittest.TestCase):
         self.assertEqual(payload["appName"], "vtm-ray")
 
     def test_stop_ray_serving(self) -> None:
-        with patch.object(
-            routes,
+        self._patch(
             "serving_manager",
             SimpleNamespace(stop_ray_server=lambda server_id: {"serverId": server_id, "status": "stopped"}),
-        ):
-            payload = routes.stop_ray_serving(StopRayServingRequest(serverId="ray-1"))
+        )
+        payload = routes.stop_ray_serving(StopRayServingRequest(serverId="ray-1"))
 
         self.assertEqual(payload["serverId"], "ray-1")
         self.assertEqual(payload["status"], "stopped")
 
     def test_list_ray_serving(self) -> None:
-        with patch.object(
-            routes,
+        self._patch(
             "serving_manager",
             SimpleNamespace(list_ray_servers=lambda: [{"serverId": "ray-1", "status": "running"}]),
-        ):
-            payload = routes.list_ray_serving()
+        )
+        payload = routes.list_ray_serving()
 
         self.assertEqual(payload["items"][0]["serverId"], "ray-1")
         self.assertEqual(payload["items"][0]["status"], "running")
 
     def test_get_mlflow_experiments(self) -> None:
-        with (
-            patch.object(
-                routes,
-                "settings",
-                SimpleNamespace(default_mlflow_tracking_uri="http://127.0.0.1:5001"),
-            ),
-            patch.object(
-                routes,
-                "list_experiments",
-                return_value=[
-                    {"experimentId": "1", "name": "void-train-manager", "lifecycleStage": "active"},
-                    {"experimentId": "2", "name": "seg-exp", "lifecycleStage": "active"},
-                ],
-            ) as mocked_list,
-        ):
-            payload = routes.get_mlflow_experiments()
+        mocked_list = self._patch(
+            "list_experiments",
+            return_value=[
+                {"experimentId": "1", "name": "void-train-manager", "lifecycleStage": "active"},
+                {"experimentId": "2", "name": "seg-exp", "lifecycleStage": "active"},
+            ],
+        )
+        payload = routes.get_mlflow_experiments()
 
         self.assertEqual(len(payload["items"]), 2)
         self.assertEqual(payload["items"][0]["name"], "void-train-manager")
         mocked_list.assert_called_once()
 
-    def test_catalog_models_uses_registry_models_from_yaml(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="registry-routes-") as temp_dir:
-            catalog_path = Path(temp_dir) / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    """
-                    tasks:
-                      - taskType: classification
-                        title: Classification
-                        baseTaskType: classification
-                        runner:
-                          target: backend/trainers/train_classification.py
-                    registryModels:
-                      - id: classification
-                        title: Classification Model
-                        taskType: classification
-                        modelName: classification-best-model
-                        defaultStage: release
-                        defaultVersion: latest
-                        defaultDestinationDir: ./backend/artifacts/downloads
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
-            )
-            fake_getter = _FakeCatalogGetter(catalog_path)
-
-            with (
-                patch.object(routes, "get_task_catalog", fake_getter),
-                patch.object(routes, "ftp_registry", _FakeFtpRegistry()),
-            ):
-                payload = routes.list_catalog_registry_models(includeVersions=True)
+    def test_catalog_models_uses_registry_models_from_catalog(self) -> None:
+        self._patch("get_task_catalog", _FakeCatalogGetter(_REGISTRY_CATALOG_PAYLOAD))
+        self._patch("ftp_registry", _FAKE_FTP_REGISTRY)
+        payload = routes.list_catalog_registry_models(includeVersions=True)
 
         self.assertEqual(len(payload["items"]), 1)
         item = payload["items"][0]
@@ -169,39 +217,20 @@ class RegistryRoutesTest(unittest.TestCase):
         self.assertFalse(item["stages"]["dev"]["exists"])
 
     def test_download_registry_model_uses_defaults(self) -> None:
-        resolved_payload = {
-            "resolvedVersion": "v0003",
-            "bundlePath": "/release/classification-best-model/versions/v0003/bundle.tar.gz",
-            "manifestPath": "/release/classification-best-model/versions/v0003/manifest.json",
-            "entry": {},
-        }
-
-        with (
-            patch.object(routes, "settings", SimpleNamespace(
-                ftp_default_host="0.0.0.0",
-                ftp_default_port=2121,
-                ftp_default_username="mlops",
-                ftp_default_password="mlops123!",
-            )),
-            patch.object(
-                routes,
-                "ftp_registry",
-                SimpleNamespace(resolve=lambda stage, model_name, version: resolved_payload),
-            ),
-            patch.object(routes, "download_file_via_ftp", return_value="/tmp/downloads/bundle.tar.gz") as mocked_download,
-        ):
-            result = routes.download_ftp_registry_model(
-                DownloadRegisteredFtpModelRequest(
-                    modelName="classification-best-model",
-                    stage="release",
-                    version="latest",
-                    destinationDir="/tmp/downloads",
-                )
+        self._patch("ftp_registry", SimpleNamespace(resolve=lambda stage, model_name, version: _RESOLVED_PAYLOAD))
+        mocked_download = self._patch("download_file_via_ftp", return_value="/tmp/downloads/bundle.tar.gz")
+        result = routes.download_ftp_registry_model(
+            DownloadRegisteredFtpModelRequest(
+                modelName="classification-best-model",
+                stage="release",
+                version="latest",
+                destinationDir="/tmp/downloads",
             )
+        )
 
         self.assertEqual(result["resolvedVersion"], "v0003")
         self.assertEqual(result["artifact"], "bundle")
-        self.assertEqual(result["remotePath"], resolved_payload["bundlePath"])
+        self.assertEqual(result["remotePath"], _RESOLVED_PAYLOAD["bundlePath"])
         self.assertEqual(result["localPath"], "/tmp/downloads/bundle.tar.gz")
         mocked_download.assert_called_once()
         called_kwargs = mocked_download.call_args.kwargs
@@ -211,69 +240,34 @@ class RegistryRoutesTest(unittest.TestCase):
         self.assertEqual(called_kwargs["password"], "mlops123!")
 
     def test_publish_best_to_ftp_registry(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="registry-best-") as temp_dir:
-            catalog_path = Path(temp_dir) / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    """
-                    tasks:
-                      - taskType: classification
-                        title: Classification
-                        baseTaskType: classification
-                        runner:
-                          target: backend/trainers/train_classification.py
-                        mlflow:
-                          metric: val_accuracy
-                          mode: max
-                          modelName: classification-best-model
-                          artifactPath: model
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
+        self._patch("get_task_catalog", _FakeCatalogGetter(_MLFLOW_CATALOG_PAYLOAD))
+        mocked_best = self._patch(
+            "select_best_run",
+            return_value=SimpleNamespace(
+                run_id="abc123run",
+                metric_name="val_accuracy",
+                metric_value=0.9321,
+                artifact_uri="mlflow-artifacts:/abc123run/artifacts",
+            ),
+        )
+        self._patch(
+            "ftp_registry",
+            SimpleNamespace(
+                publish_from_mlflow=lambda **kwargs: {
+                    "modelName": kwargs["model_name"],
+                    "stage": kwargs["stage"],
+                    "version": kwargs.get("version") or "v0001",
+                }
+            ),
+        )
+        result = routes.publish_best_to_ftp_registry(
+            PublishBestFtpModelRequest(
+                taskType="classification",
+                stage="dev",
+                experimentName="void-train-manager",
+                setLatest=True,
             )
-            fake_getter = _FakeCatalogGetter(catalog_path)
-
-            with (
-                patch.object(routes, "get_task_catalog", fake_getter),
-                patch.object(
-                    routes,
-                    "settings",
-                    SimpleNamespace(
-                        default_mlflow_tracking_uri="http://127.0.0.1:5001",
-                        default_mlflow_experiment="void-train-manager",
-                    ),
-                ),
-                patch.object(
-                    routes,
-                    "select_best_run",
-                    return_value=SimpleNamespace(
-                        run_id="abc123run",
-                        metric_name="val_accuracy",
-                        metric_value=0.9321,
-                        artifact_uri="mlflow-artifacts:/abc123run/artifacts",
-                    ),
-                ) as mocked_best,
-                patch.object(
-                    routes,
-                    "ftp_registry",
-                    SimpleNamespace(
-                        publish_from_mlflow=lambda **kwargs: {
-                            "modelName": kwargs["model_name"],
-                            "stage": kwargs["stage"],
-                            "version": kwargs.get("version") or "v0001",
-                        }
-                    ),
-                ),
-            ):
-                result = routes.publish_best_to_ftp_registry(
-                    PublishBestFtpModelRequest(
-                        taskType="classification",
-                        stage="dev",
-                        experimentName="void-train-manager",
-                        setLatest=True,
-                    )
-                )
+        )
 
         self.assertEqual(result["taskType"], "classification")
         self.assertEqual(result["runId"], "abc123run")
@@ -296,23 +290,20 @@ class RegistryRoutesTest(unittest.TestCase):
                 "version": kwargs.get("version") or "v0007",
             }
 
-        with patch.object(
-            routes,
-            "ftp_registry",
-            SimpleNamespace(publish_from_local=_fake_publish_from_local),
-        ):
-            upload = UploadFile(filename="manual-model.pt", file=io.BytesIO(b"pt-binary"))
-            result = routes.upload_local_to_ftp_registry(
-                file=upload,
-                modelName="segmentation-best-model",
-                stage="release",
-                version="v0100",
-                setLatest="true",
-                notes="manual upload",
-                convertToTorchStandard="true",
-                torchTaskType="segmentation",
-                torchNumClasses=2,
-            )
+        self._patch("ftp_registry", SimpleNamespace(publish_from_local=_fake_publish_from_local))
+        # The route is synchronous and only touches .filename/.file, so skip Starlette's spooled wrapper.
+        upload = cast(UploadFile, SimpleNamespace(filename="manual-model.pt", file=io.BytesIO(b"pt-binary")))
+        result = routes.upload_local_to_ftp_registry(
+            file=upload,
+            modelName="segmentation-best-model",
+            stage="release",
+            version="v0100",
+            setLatest="true",
+            notes="manual upload",
+            convertToTorchStandard="true",
+            torchTaskType="segmentation",
+            torchNumClasses=2,
+        )
 
         self.assertEqual(result["uploadedFilename"], "manual-model.pt")
         self.assertEqual(result["published"]["stage"], "release")
@@ -1,12 +1,11 @@
 from __future__ import annotations
 
 import tempfile
-import textwrap
 import unittest
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import MagicMock, patch
 
-from app.core.task_catalog import TaskCatalogService
+from app.core.task_catalog import validate_catalog_payload
 from app.services.run_manager import RunManager
 
 
@@ -19,179 +18,152 @@ class _FakeProcess:
         return 0
 
 
-def _argument_value(command: list[str], flag: str) -> str:
-    index = command.index(flag)
-    return command[index + 1]
+def _argv_to_map(command: list[str]) -> dict[str, str]:
+    # command is [python, script, --flag, value, ...]
+    return dict(zip(command[2::2], command[3::2]))
 
 
 class RunManagerExtraFieldsTest(unittest.TestCase):
-    def test_start_run_appends_yaml_extra_fields_to_cli(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="run-manager-extra-") as temp_dir:
-            temp_path = Path(temp_dir)
-            script_path = temp_path / "train_external.py"
-            script_path.write_text("print('ok')\n", encoding="utf-8")
-
-            catalog_path = temp_path / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    f"""
-                    tasks:
-                      - taskType: cls-external
-                        enabled: true
-                        title: External Classification
-                        baseTaskType: classification
-                        runner:
-                          startMethod: python_script
-                          target: {script_path}
-                        mlflow:
-                          metric: val_accuracy
-                          mode: max
-                          modelName: cls-external-best
-                          artifactPath: model
-                        extraFields:
-                          - name: train_profile
-                            valueType: str
-                            type: select
-                            default: fast
-                            required: true
-                            choices: [fast, full]
-                          - name: grad_clip
-                            valueType: float
-                            type: number
-                            default: 0.5
-                            cliArg: --grad-clip
-                          - name: dry_run
-                            valueType: bool
-                            type: boolean
-                            default: false
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
-            )
-
-            catalog = TaskCatalogService(catalog_path).load()
-            fake_process = _FakeProcess()
-
-            with (
-                patch("app.services.run_manager.get_task_catalog", return_value=catalog),
-                patch("app.services.run_manager.subprocess.Popen", return_value=fake_process) as popen_mock,
-                patch.object(RunManager, "_watch_run", return_value=None),
-            ):
-                manager = RunManager()
-                result = manager.start_run(
-                    "cls-external",
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls._temp_dir = tempfile.TemporaryDirectory(prefix="run-manager-")
+        cls.addClassCleanup(cls._temp_dir.cleanup)
+        cls.temp_path = Path(cls._temp_dir.name)
+        cls.script_path = cls.temp_path / "train_external.py"
+        cls.script_path.write_text("print('ok')\n", encoding="utf-8")
+
+        script = str(cls.script_path)
+        # Tests only read the catalog, so one validated catalog serves the whole class.
+        cls.catalog = validate_catalog_payload(
+            {
+                "tasks": [
                     {
-                        "dataset_root": str(temp_path / "datasets"),
-                        "output_root": str(temp_path / "outputs"),
-                        "train_profile": "full",
-                        "dry_run": True,
+                        "taskType": "cls-external",
+                        "enabled": True,
+                        "title": "External Classification",
+                        "baseTaskType": "classification",
+                        "runner": {"startMethod": "python_script", "target": script},
+                        "mlflow": {
+                            "metric": "val_accuracy",
+                            "mode": "max",
+                            "modelName": "cls-external-best",
+                            "artifactPath": "model",
+                        },
+                        "extraFields": [
+                            {
+                                "name": "train_profile",
+                                "valueType": "str",
+                                "type": "select",
+                                "default": "fast",
+                                "required": True,
+                                "choices": ["fast", "full"],
+                            },
+                            {
+                                "name": "grad_clip",
+                                "valueType": "float",
+                                "type": "number",
+                                "default": 0.5,
+                                "cliArg": "--grad-clip",
+                            },
+                            {"name": "dry_run", "valueType": "bool", "type": "boolean", "default": False},
+                        ],
                     },
-                )
-
-            command = result["command"]
-            self.assertEqual(command[1], str(script_path))
-            self.assertEqual(_argument_value(command, "--train-profile"), "full")
-            self.assertEqual(_argument_value(command, "--grad-clip"), "0.5")
-            self.assertEqual(_argument_value(command, "--dry-run"), "true")
-            self.assertEqual(result["config"]["train_profile"], "full")
-            self.assertEqual(result["config"]["grad_clip"], 0.5)
-            self.assertEqual(result["config"]["dry_run"], True)
-            popen_mock.assert_called_once()
+                    {
+                        "taskType": "seg-external",
+                        "enabled": True,
+                        "title": "External Segmentation",
+                        "baseTaskType": "segmentation",
+                        "runner": {"startMethod": "python_script", "target": script},
+                        "mlflow": {
+                            "metric": "val_iou",
+                            "mode": "max",
+                            "modelName": "seg-external-best",
+                            "artifactPath": "model",
+                        },
+                        "extraFields": [{"name": "dataset_tag", "valueType": "str", "required": True}],
+                    },
+                    {
+                        "taskType": "cls-gpu-validate",
+                        "enabled": True,
+                        "title": "External Classification",
+                        "baseTaskType": "classification",
+                        "runner": {"startMethod": "python_script", "target": script},
+                        "mlflow": {
+                            "metric": "val_accuracy",
+                            "mode": "max",
+                            "modelName": "cls-gpu-validate-best",
+                            "artifactPath": "model",
+                        },
+                    },
+                ],
+                "runtime": {"availableGpuIds": [0]},
+            },
+            source="test",
+        )
+
+        cls.popen_mock = MagicMock(return_value=_FakeProcess())
+        for patcher in (
+            patch("app.services.run_manager.get_task_catalog", return_value=cls.catalog),
+            patch("app.services.run_manager.subprocess.Popen", cls.popen_mock),
+            patch.object(RunManager, "_watch_run", return_value=None),
+        ):
+            patcher.start()
+            cls.addClassCleanup(patcher.stop)
+
+    def setUp(self) -> None:
+        self.popen_mock.reset_mock()
+
+    def test_start_run_appends_yaml_extra_fields_to_cli(self) -> None:
+        manager = RunManager()
+        result = manager.start_run(
+            "cls-external",
+            {
+                "dataset_root": str(self.temp_path / "datasets"),
+                "output_root": str(self.temp_path / "outputs"),
+                "train_profile": "full",
+                "dry_run": True,
+            },
+        )
+
+        command = result["command"]
+        self.assertEqual(command[1], str(self.script_path))
+        cli = _argv_to_map(command)
+        self.assertEqual(cli["--train-profile"], "full")
+        self.assertEqual(cli["--grad-clip"], "0.5")
+        self.assertEqual(cli["--dry-run"], "true")
+        self.assertEqual(result["config"]["train_profile"], "full")
+        self.assertEqual(result["config"]["grad_clip"], 0.5)
+        self.assertEqual(result["config"]["dry_run"], True)
+        self.popen_mock.assert_called_once()
 
     def test_start_run_validates_missing_required_extra_field(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="run-manager-required-extra-") as temp_dir:
-            temp_path = Path(temp_dir)
-            script_path = temp_path / "train_external.py"
-            script_path.write_text("print('ok')\n", encoding="utf-8")
-
-            catalog_path = temp_path / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    f"""
-                    tasks:
-                      - taskType: seg-external
-                        enabled: true
-                        title: External Segmentation
-                        baseTaskType: segmentation
-                        runner:
-                          startMethod: python_script
-                          target: {script_path}
-                        mlflow:
-                          metric: val_iou
-                          mode: max
-                          modelName: seg-external-best
-                          artifactPath: model
-                        extraFields:
-                          - name: dataset_tag
-                            valueType: str
-                            required: true
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
+        manager = RunManager()
+        with self.assertRaises(ValueError) as context:
+            manager.start_run(
+                "seg-external",
+                {
+                    "dataset_root": str(self.temp_path / "datasets"),
+                    "output_root": str(self.temp_path / "outputs"),
+                },
             )
 
-            catalog = TaskCatalogService(catalog_path).load()
-
-            with patch("app.services.run_manager.get_task_catalog", return_value=catalog):
-                manager = RunManager()
-                with self.assertRaises(ValueError) as context:
-                    manager.start_run(
-                        "seg-external",
-                        {
-                            "dataset_root": str(temp_path / "datasets"),
-                            "output_root": str(temp_path / "outputs"),
-                        },
-                    )
-
-            self.assertIn("Missing required extra field: dataset_tag", str(context.exception))
+        self.assertIn("Missing required extra field: dataset_tag", str(context.exception))
+        self.popen_mock.assert_not_called()
 
     def test_start_run_rejects_gpu_ids_not_in_runtime_available_gpu_ids(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="run-manager-gpu-validate-") as temp_dir:
-            temp_path = Path(temp_dir)
-            script_path = temp_path / "train_external.py"
-            script_path.write_text("print('ok')\n", encoding="utf-8")
-
-            catalog_path = temp_path / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    f"""
-                    tasks:
-                      - taskType: cls-gpu-validate
-                        enabled: true
-                        title: External Classification
-                        baseTaskType: classification
-                        runner:
-                          startMethod: python_script
-                          target: {script_path}
-                        mlflow:
-                          metric: val_accuracy
-                          mode: max
-                          modelName: cls-gpu-validate-best
-                          artifactPath: model
-                    runtime:
-                      availableGpuIds: [0]
-                    """
-                ).strip()
-                + "\n",
-                encoding="utf-8",
+        manager = RunManager()
+        with self.assertRaises(ValueError) as context:
+            manager.start_run(
+                "cls-gpu-validate",
+                {
+                    "dataset_root": str(self.temp_path / "datasets"),
+                    "output_root": str(self.temp_path / "outputs"),
+                    "gpu_ids": "1",
+                },
             )
 
-            catalog = TaskCatalogService(catalog_path).load()
-            with patch("app.services.run_manager.get_task_catalog", return_value=catalog):
-                manager = RunManager()
-                with self.assertRaises(ValueError) as context:
-                    manager.start_run(
-                        "cls-gpu-validate",
-                        {
-                            "dataset_root": str(temp_path / "datasets"),
-                            "output_root": str(temp_path / "outputs"),
-                            "gpu_ids": "1",
-                        },
-                    )
-
-            self.assertIn("Invalid gpu_ids for current server", str(context.exception))
+        self.assertIn("Invalid gpu_ids for current server", str(context.exception))
+        self.popen_mock.assert_not_called()
 
 
 if __name__ == "__main__":
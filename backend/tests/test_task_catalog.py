@@ -5,10 +5,43 @@ import textwrap
 import unittest
 from pathlib import Path
 
+import yaml
+
 from app.api.routes import _build_task_schema
+from app.core import task_catalog
 from app.core.task_catalog import TaskCatalogService, validate_catalog_payload
 
 
+_REGISTRY_CATALOG_PAYLOAD = {
+    "tasks": [
+        {
+            "taskType": "classification",
+            "enabled": True,
+            "title": "Classification",
+            "baseTaskType": "classification",
+            "runner": {"startMethod": "python_script", "target": "backend/trainers/train_classification.py"},
+            "mlflow": {
+                "metric": "val_accuracy",
+                "mode": "max",
+                "modelName": "classification-best-model",
+                "artifactPath": "model",
+            },
+        }
+    ],
+    "registryModels": [
+        {
+            "id": "clf-main",
+            "title": "Classification Main",
+            "taskType": "classification",
+            "modelName": "classification-best-model",
+            "defaultStage": "release",
+            "defaultVersion": "latest",
+            "defaultDestinationDir": "./downloads",
+        }
+    ],
+}
+
+
 class TaskCatalogTest(unittest.TestCase):
     def test_load_catalog_and_schema_override(self) -> None:
         with tempfile.TemporaryDirectory(prefix="task-catalog-") as temp_dir:
@@ -71,7 +104,7 @@ class TaskCatalogTest(unittest.TestCase):
             self.assertEqual(registry_models[0].model_name, "cls-v2-best")
             self.assertEqual(len(task.extra_fields), 2)
             self.assertEqual(task.extra_fields[0].name, "profile")
-            self.assertEqual(task.extra_fields[1].cli_flag(), "--debug")
+            self.assertEqual(task.extra_fields[1].cli_flag_str, "--debug")
 
             schema = _build_task_schema(task)
             self.assertEqual(schema["taskType"], "cls-v2")
@@ -88,46 +121,44 @@ class TaskCatalogTest(unittest.TestCase):
             self.assertIn("debug_mode", schema_field_map)
             self.assertEqual(schema_field_map["debug_mode"]["cliArg"], "--debug")
 
+            schema["fields"][0]["default"] = "mutated"
+            schema_field_map["profile"]["choices"].append("broken")
+            schema["fields"].clear()
+            fresh_schema = _build_task_schema(task)
+            self.assertEqual(fresh_schema["fields"][0]["default"], "custom-run")
+            fresh_field_map = {field["name"]: field for field in fresh_schema["fields"]}
+            self.assertEqual(fresh_field_map["profile"]["choices"], ["fast", "full"])
+
     def test_load_catalog_with_registry_models(self) -> None:
-        with tempfile.TemporaryDirectory(prefix="task-catalog-registry-") as temp_dir:
-            catalog_path = Path(temp_dir) / "training_catalog.yaml"
-            catalog_path.write_text(
-                textwrap.dedent(
-                    """
-                    tasks:
-                      - taskType: classification
-                        enabled: true
-                        title: "Classification"
-                        baseTaskType: classification
-                        runner:
-                          startMethod: python_script
-                          target: backend/trainers/train_classification.py
-                        mlflow:
-                          metric: val_accuracy
-                          mode: max
-                          modelName: classification-best-model
-                          artifactPath: model
-                    registryModels:
-                      - id: clf-main
-                        title: "Classification Main"
-                        taskType: classification
-                        modelName: classification-best-model
-                        defaultStage: release
-                        defaultVersion: latest
-                        defaultDestinationDir: ./downloads
-                    """
-                ),
-                encoding="utf-8",
-            )
+        catalog = TaskCatalogService.from_mapping(_REGISTRY_CATALOG_PAYLOAD, source="test").load()
+        registry_models = catalog.list_registry_models()
+
+        self.assertEqual(len(registry_models), 1)
+        self.assertEqual(registry_models[0].model_id, "clf-main")
+        self.assertEqual(registry_models[0].default_stage, "release")
+        self.assertEqual(registry_models[0].default_destination_dir, "./downloads")
 
+    def test_load_reuses_catalog_until_file_changes(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="task-catalog-cache-") as temp_dir:
+            catalog_path = Path(temp_dir) / "training_catalog.yaml"
+            catalog_path.write_text(yaml.safe_dump(_REGISTRY_CATALOG_PAYLOAD), encoding="utf-8")
             service = TaskCatalogService(catalog_path)
-            catalog = service.load()
-            registry_models = catalog.list_registry_models()
 
-            self.assertEqual(len(registry_models), 1)
-            self.assertEqual(registry_models[0].model_id, "clf-main")
-            self.assertEqual(registry_models[0].default_stage, "release")
-            self.assertEqual(registry_models[0].default_destination_dir, "./downloads")
+            first = service.load()
+            self.assertIs(TaskCatalogService(catalog_path).load(), first)
+
+            catalog_path.write_text(yaml.safe_dump({"tasks": _REGISTRY_CATALOG_PAYLOAD["tasks"]}), encoding="utf-8")
+            reloaded = service.load()
+            self.assertIsNot(reloaded, first)
+            self.assertEqual(reloaded.list_registry_models()[0].model_id, "classification")
+
+            TaskCatalogService.clear_cache()
+            self.assertIsNot(service.load(), reloaded)
+
+    def test_catalog_yaml_uses_libyaml(self) -> None:
+        self.assertTrue(yaml.__with_libyaml__, "PyYAML is installed without libyaml bindings")
+        self.assertIs(task_catalog._YAML_LOADER, yaml.CSafeLoader)
+        self.assertIs(task_catalog._YAML_DUMPER, yaml.CSafeDumper)
 
     def test_duplicate_task_type_raises(self) -> None:
         payload = {
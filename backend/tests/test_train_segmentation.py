@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import unittest
+
+import torch
+import torch.nn.functional as F
+
+from trainers.train_segmentation import dice_loss, mean_iou
+
+
+class SegmentationMetricsTest(unittest.TestCase):
+    def test_mean_iou_matches_per_class_masks(self) -> None:
+        torch.manual_seed(0)
+        num_classes = 4
+        logits = torch.randn(2, num_classes, 8, 8)
+        targets = torch.randint(0, num_classes, (2, 8, 8))
+        preds = torch.argmax(logits, dim=1)
+
+        expected = []
+        for cls in range(num_classes):
+            intersection = torch.logical_and(preds == cls, targets == cls).sum().item()
+            union = torch.logical_or(preds == cls, targets == cls).sum().item()
+            expected.append((intersection + 1e-6) / (union + 1e-6))
+
+        self.assertAlmostEqual(mean_iou(logits, targets, num_classes).item(), sum(expected) / num_classes, places=5)
+
+    def test_mean_iou_excludes_ignored_pixels(self) -> None:
+        torch.manual_seed(0)
+        num_classes = 3
+        logits = torch.randn(2, num_classes, 8, 8)
+        targets = torch.randint(0, num_classes, (2, 8, 8))
+        ignored = torch.rand(2, 8, 8) < 0.3
+        targets[ignored] = 255
+        targets[0, 0, 0] = -1
+        kept = (targets >= 0) & (targets < num_classes)
+        preds = torch.argmax(logits, dim=1)
+
+        expected = []
+        for cls in range(num_classes):
+            intersection = ((preds == cls) & (targets == cls) & kept).sum().item()
+            union = (((preds == cls) | (targets == cls)) & kept).sum().item()
+            expected.append((intersection + 1e-6) / (union + 1e-6))
+
+        self.assertAlmostEqual(mean_iou(logits, targets, num_classes).item(), sum(expected) / num_classes, places=5)
+
+    def test_dice_loss_matches_one_hot_formulation(self) -> None:
+        torch.manual_seed(0)
+        num_classes = 3
+        logits = torch.randn(2, num_classes, 8, 8)
+        targets = torch.randint(0, num_classes, (2, 8, 8))
+
+        probs = torch.softmax(logits, dim=1)
+        one_hot = F.one_hot(targets, num_classes=num_classes).permute(0, 3, 1, 2).float()
+        intersection = torch.sum(probs * one_hot, dim=(2, 3))
+        denominator = torch.sum(probs + one_hot, dim=(2, 3))
+        expected = 1.0 - ((2 * intersection + 1e-6) / (denominator + 1e-6)).mean()
+
+        torch.testing.assert_close(dice_loss(logits, targets, num_classes), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+from __future__ import annotations
+
+import io
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import torch
+from torch import nn
+
+import trainers.common as common
+
+
+def _distributed_worker(config: SimpleNamespace) -> None:
+    context = common.setup_distributed(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    try:
+        model = common.wrap_distributed(nn.Linear(2, 1, bias=False), context)
+        with torch.no_grad():
+            model.module.weight.fill_(1.0)
+        model(torch.full((1, 2), float(context.rank + 1))).sum().backward()
+        averaged = common.average_across_ranks([torch.tensor(float(context.rank))], context)
+        result = {"world_size": context.world_size, "averaged": averaged, "grad": model.module.weight.grad.tolist()}
+        (Path(config.output_dir) / f"rank{context.rank}.json").write_text(json.dumps(result), encoding="utf-8")
+    finally:
+        common.cleanup_distributed(context)
+
+
+def _capture_stdout() -> io.TextIOWrapper:
+    return io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+
+
+def _progress_lines(stdout: io.TextIOWrapper) -> list[dict]:
+    stdout.flush()
+    lines = stdout.buffer.getvalue().decode("utf-8").splitlines()
+    return [json.loads(line.removeprefix(common.PROGRESS_PREFIX)) for line in lines]
+
+
+class ProgressOutputTest(unittest.TestCase):
+    def test_non_finite_metrics_serialize_as_null(self) -> None:
+        payload = {"epoch": 1, "train_loss": float("nan"), "val_loss": float("inf"), "history": [float("-inf"), 0.5]}
+        stdout = _capture_stdout()
+        with patch.object(common.sys, "stdout", stdout):
+            common.emit_progress(payload)
+
+        self.assertEqual(
+            _progress_lines(stdout),
+            [{"epoch": 1, "train_loss": None, "val_loss": None, "history": [None, 0.5]}],
+        )
+
+
+class ProgressEmitterTest(unittest.TestCase):
+    def test_coalesces_until_max_pending(self) -> None:
+        stdout = _capture_stdout()
+        with patch.object(common.sys, "stdout", stdout):
+            emitter = common.ProgressEmitter(interval_sec=60, max_pending=3)
+            emitter.progress({"epoch": 1})
+            emitter.progress({"epoch": 2})
+            self.assertEqual(_progress_lines(stdout), [])
+
+            emitter.progress({"epoch": 3})
+            self.assertEqual(_progress_lines(stdout), [{"epoch": 1}, {"epoch": 2}, {"epoch": 3}])
+            emitter.flush()
+
+    def test_pending_lines_flush_on_exit(self) -> None:
+        stdout = _capture_stdout()
+        with patch.object(common.sys, "stdout", stdout):
+            with common.ProgressEmitter(interval_sec=60) as emitter:
+                emitter.progress({"epoch": 1})
+                self.assertEqual(_progress_lines(stdout), [])
+
+        self.assertEqual(_progress_lines(stdout), [{"epoch": 1}])
+
+    def test_timer_flushes_line_queued_right_after_a_flush(self) -> None:
+        stdout = _capture_stdout()
+        with patch.object(common.sys, "stdout", stdout):
+            emitter = common.ProgressEmitter(interval_sec=0.05)
+            emitter.flush()
+            emitter.progress({"epoch": 1})
+
+            deadline = time.monotonic() + 5
+            while not _progress_lines(stdout) and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertEqual(_progress_lines(stdout), [{"epoch": 1}])
+
+
+class MetricBatcherTest(unittest.TestCase):
+    def test_sends_one_batch_per_flush_interval_and_on_exit(self) -> None:
+        with patch.object(common.mlflow, "MlflowClient") as client_cls:
+            client = client_cls.return_value
+            with common.MetricBatcher("run-1", flush_every=2) as batcher:
+                batcher.log({"train_loss": 1.0, "val_loss": 2.0}, step=1)
+                client.log_batch.assert_not_called()
+                batcher.log({"train_loss": 0.5, "val_loss": 1.5}, step=2)
+                client.log_batch.assert_called_once()
+                batcher.log({"train_loss": 0.25}, step=3)
+
+        self.assertEqual(client.log_batch.call_count, 2)
+        first, second = (call.kwargs["metrics"] for call in client.log_batch.call_args_list)
+        self.assertEqual(
+            [(metric.key, metric.value, metric.step) for metric in first],
+            [("train_loss", 1.0, 1), ("val_loss", 2.0, 1), ("train_loss", 0.5, 2), ("val_loss", 1.5, 2)],
+        )
+        self.assertEqual([(metric.key, metric.value, metric.step) for metric in second], [("train_loss", 0.25, 3)])
+        self.assertEqual(client.log_batch.call_args.args, ("run-1",))
+
+
+class CheckpointWriterTest(unittest.TestCase):
+    def test_writes_snapshot_taken_at_save_time_and_uploads_artifacts(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="checkpoint-writer-") as temp_dir:
+            epoch_path = Path(temp_dir) / "epoch_1.pt"
+            best_path = Path(temp_dir) / "best.pt"
+            weight = torch.zeros(3)
+            with patch.object(common.mlflow, "MlflowClient") as client_cls:
+                with common.CheckpointWriter("run-1") as writer:
+                    writer.save({"weight": weight}, [(epoch_path, "checkpoints"), (best_path, None)])
+                    weight.add_(1.0)
+
+            for path in (epoch_path, best_path):
+                torch.testing.assert_close(torch.load(path)["weight"], torch.zeros(3))
+        client_cls.return_value.log_artifact.assert_called_once_with(
+            "run-1", str(epoch_path), artifact_path="checkpoints"
+        )
+
+    def test_close_raises_background_write_errors(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="checkpoint-writer-") as temp_dir:
+            with patch.object(common.mlflow, "MlflowClient") as client_cls:
+                client_cls.return_value.log_artifact.side_effect = RuntimeError("upload failed")
+                writer = common.CheckpointWriter("run-1")
+                writer.save({"epoch": 1}, [(Path(temp_dir) / "epoch_1.pt", "checkpoints")])
+                with self.assertRaisesRegex(RuntimeError, "upload failed"):
+                    writer.close()
+
+
+class SyntheticBatchFeederTest(unittest.TestCase):
+    @staticmethod
+    def _feeder(device: torch.device) -> common.SyntheticBatchFeeder:
+        counter = iter(range(1, 1000))
+
+        def fill(values: torch.Tensor) -> None:
+            values.fill_(next(counter))
+
+        return common.SyntheticBatchFeeder(lambda: (torch.empty(4, device=device),), fill, device=device)
+
+    def test_cpu_refills_a_single_buffer_each_step(self) -> None:
+        feeder = self._feeder(torch.device("cpu"))
+        seen = [(values.data_ptr(), values[0].item()) for (values,) in feeder.batches(3)]
+
+        self.assertEqual([value for _, value in seen], [1.0, 2.0, 3.0])
+        self.assertEqual(len({pointer for pointer, _ in seen}), 1)
+
+    @unittest.skipUnless(torch.cuda.is_available(), "requires CUDA")
+    def test_cuda_alternates_double_buffers(self) -> None:
+        feeder = self._feeder(torch.device("cuda"))
+        seen = [(values.data_ptr(), values.sum().item()) for (values,) in feeder.batches(4)]
+
+        self.assertEqual([value for _, value in seen], [4.0, 8.0, 12.0, 16.0])
+        pointers = [pointer for pointer, _ in seen]
+        self.assertEqual(len(set(pointers)), 2)
+        self.assertNotEqual(pointers[0], pointers[1])
+        self.assertEqual(pointers[0], pointers[2])
+
+
+class ConfigSidecarTest(unittest.TestCase):
+    def test_runs_sharing_a_checkpoint_dir_keep_their_own_config(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="sidecar-test-") as temp_dir:
+            checkpoint_dir = Path(temp_dir)
+            first = common.write_config_sidecar(checkpoint_dir, {"epochs": 1}, run_id="run-a")
+            second = common.write_config_sidecar(checkpoint_dir, {"epochs": 2}, run_id="run-b")
+
+            self.assertEqual(first.name, "config_run-a.json")
+            self.assertEqual(json.loads(first.read_text(encoding="utf-8")), {"epochs": 1})
+            self.assertEqual(json.loads(second.read_text(encoding="utf-8")), {"epochs": 2})
+
+
+class GpuIdSelectionTest(unittest.TestCase):
+    def test_usable_gpu_ids_drops_missing_and_repeated_devices(self) -> None:
+        with patch.object(common, "_CUDA_COUNT", 2):
+            self.assertEqual(common.usable_gpu_ids("1, 5,0,1"), [1, 0])
+            self.assertEqual(common.usable_gpu_ids(""), [])
+
+    def test_world_size_matches_usable_gpu_ids(self) -> None:
+        with (
+            patch.object(common, "_CUDA_AVAILABLE", True),
+            patch.object(common, "_CUDA_COUNT", 2),
+            patch.object(common.dist, "is_available", return_value=True),
+        ):
+            self.assertEqual(common.requested_world_size(gpu_ids="0,7,1", force_cpu=False), 2)
+            self.assertEqual(common.requested_world_size(gpu_ids="7", force_cpu=False), 1)
+            self.assertEqual(common.requested_world_size(gpu_ids="0,1", force_cpu=True), 1)
+
+    def test_setup_distributed_binds_ranks_to_usable_gpu_ids(self) -> None:
+        with (
+            patch.object(common, "_CUDA_AVAILABLE", True),
+            patch.object(common, "_CUDA_COUNT", 2),
+            patch.dict(common.os.environ, {"WORLD_SIZE": "2", "LOCAL_RANK": "1"}),
+            patch.object(common.torch.cuda, "set_device") as set_device,
+            patch.object(common.dist, "init_process_group"),
+            patch.object(common.dist, "get_rank", return_value=1),
+            patch.object(common.dist, "get_world_size", return_value=2),
+        ):
+            context = common.setup_distributed(gpu_ids="1,9,0", force_cpu=False)
+
+        self.assertEqual(context.device, common.torch.device("cuda:0"))
+        set_device.assert_called_once_with(context.device)
+
+
+class CudaAllocatorConfigTest(unittest.TestCase):
+    def test_sets_default_only_when_unconfigured(self) -> None:
+        with patch.dict(common.os.environ, {}, clear=True):
+            common.configure_cuda_allocator()
+            self.assertIn("expandable_segments:True", common.os.environ["PYTORCH_CUDA_ALLOC_CONF"])
+
+        with patch.dict(common.os.environ, {"PYTORCH_ALLOC_CONF": "backend:native"}, clear=True):
+            common.configure_cuda_allocator()
+            self.assertNotIn("PYTORCH_CUDA_ALLOC_CONF", common.os.environ)
+
+
+class LaunchTrainingTest(unittest.TestCase):
+    def test_spawned_gloo_ranks_average_gradients_and_metrics(self) -> None:
+        with tempfile.TemporaryDirectory(prefix="ddp-test-") as output_dir:
+            config = SimpleNamespace(gpu_ids="", force_cpu=True, output_dir=output_dir)
+            environ = {key: value for key, value in common.os.environ.items() if key != "WORLD_SIZE"}
+            with (
+                patch.dict(common.os.environ, environ, clear=True),
+                patch.object(common, "requested_world_size", return_value=2),
+            ):
+                common.launch_training(_distributed_worker, config)
+
+            results = [json.loads(path.read_text(encoding="utf-8")) for path in sorted(Path(output_dir).glob("*.json"))]
+
+        self.assertEqual(len(results), 2)
+        for result in results:
+            self.assertEqual(result["world_size"], 2)
+            self.assertEqual(result["averaged"], [0.5])
+            # DDP averages the per-rank gradients 1.0 and 2.0.
+            self.assertEqual(result["grad"], [[1.5, 1.5]])
+
+    def test_compiled_model_is_recompiled_around_ddp(self) -> None:
+        module = nn.Linear(2, 1)
+        compiled = SimpleNamespace(_orig_mod=module)
+        context = common.DistributedContext(device=torch.device("cpu"), rank=0, world_size=2)
+        with (
+            patch.object(common, "DistributedDataParallel") as ddp,
+            patch.object(common.torch, "compile") as compile_model,
+        ):
+            wrapped = common.wrap_distributed(compiled, context)
+
+        ddp.assert_called_once_with(module, device_ids=None, bucket_cap_mb=25)
+        compile_model.assert_called_once_with(ddp.return_value)
+        self.assertIs(wrapped, compile_model.return_value)
+
+    def test_single_process_runs_in_place(self) -> None:
+        config = SimpleNamespace(gpu_ids="", force_cpu=True)
+        calls: list[SimpleNamespace] = []
+        common.launch_training(calls.append, config)
+        self.assertEqual(calls, [config])
+
+        context = common.setup_distributed(gpu_ids="", force_cpu=True)
+        self.assertFalse(context.enabled)
+        self.assertEqual(common.average_across_ranks([torch.tensor(0.25), torch.tensor(3)], context), [0.25, 3.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,20 +1,39 @@
 from __future__ import annotations
 
 import json
+import math
+import os
 import random
+import socket
+import sys
+import threading
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
+from typing import Any
 
-import numpy as np
+import mlflow
 import torch
+import torch.distributed as dist
+from mlflow.entities import Metric
+from torch import nn
+from torch.nn.parallel import DistributedDataParallel
 
 from app.core.train_config import PROGRESS_PREFIX, RUN_META_PREFIX
+from trainers.models import unwrap_model
+
+_CUDA_AVAILABLE = torch.cuda.is_available()
+_CUDA_COUNT = torch.cuda.device_count() if _CUDA_AVAILABLE else 0
 
 
 def set_seed(seed: int) -> None:
     random.seed(seed)
-    np.random.seed(seed)
+    # Also seeds every CUDA device.
     torch.manual_seed(seed)
-    torch.cuda.manual_seed_all(seed)
 
 
 def parse_primary_gpu_id(gpu_ids: str) -> int:
@@ -22,25 +41,367 @@ def parse_primary_gpu_id(gpu_ids: str) -> int:
     return int(first) if first else 0
 
 
-def pick_device(*, gpu_ids: str, force_cpu: bool) -> torch.device:
-    if force_cpu or not torch.cuda.is_available():
+@lru_cache(maxsize=None)
+def _resolve_device(gpu_ids: str, force_cpu: bool) -> torch.device:
+    if force_cpu or not _CUDA_AVAILABLE:
         return torch.device("cpu")
 
     gpu_index = parse_primary_gpu_id(gpu_ids)
-    if gpu_index >= torch.cuda.device_count():
+    if gpu_index >= _CUDA_COUNT:
         return torch.device("cpu")
 
     return torch.device(f"cuda:{gpu_index}")
 
 
+def pick_device(*, gpu_ids: str, force_cpu: bool) -> torch.device:
+    return _resolve_device(gpu_ids, force_cpu)
+
+
+@dataclass(frozen=True)
+class DistributedContext:
+    """Process placement for one training rank; rank also offsets the seed so ranks draw distinct synthetic batches."""
+
+    device: torch.device
+    rank: int = 0
+    world_size: int = 1
+
+    @property
+    def enabled(self) -> bool:
+        return self.world_size > 1
+
+    @property
+    def is_main(self) -> bool:
+        return self.rank == 0
+
+
+def parse_gpu_id_list(gpu_ids: str) -> list[int]:
+    return [int(item) for item in gpu_ids.split(",") if item.strip()]
+
+
+def usable_gpu_ids(gpu_ids: str) -> list[int]:
+    # Rank i binds to entry i, so drop ids this host does not have and repeated ids.
+    return [gpu_id for gpu_id in dict.fromkeys(parse_gpu_id_list(gpu_ids)) if 0 <= gpu_id < _CUDA_COUNT]
+
+
+def requested_world_size(*, gpu_ids: str, force_cpu: bool) -> int:
+    if force_cpu or not _CUDA_AVAILABLE or not dist.is_available():
+        return 1
+    return max(1, len(usable_gpu_ids(gpu_ids)))
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _spawned_rank(local_rank: int, train_fn: Callable[[Any], None], config: Any, world_size: int) -> None:
+    os.environ.update(RANK=str(local_rank), LOCAL_RANK=str(local_rank), WORLD_SIZE=str(world_size))
+    train_fn(config)
+
+
+def launch_training(train_fn: Callable[[Any], None], config: Any) -> None:
+    # One process per requested GPU; runs already started by torchrun (WORLD_SIZE set) are left as they are.
+    world_size = requested_world_size(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    if world_size <= 1 or "WORLD_SIZE" in os.environ:
+        train_fn(config)
+        return
+
+    os.environ.setdefault("MASTER_ADDR", "127.0.0.1")
+    os.environ.setdefault("MASTER_PORT", str(_free_port()))
+    torch.multiprocessing.spawn(_spawned_rank, args=(train_fn, config, world_size), nprocs=world_size)
+
+
+def setup_distributed(*, gpu_ids: str, force_cpu: bool) -> DistributedContext:
+    world_size = int(os.environ.get("WORLD_SIZE", "1"))
+    if world_size <= 1:
+        return DistributedContext(device=pick_device(gpu_ids=gpu_ids, force_cpu=force_cpu))
+
+    local_rank = int(os.environ.get("LOCAL_RANK", "0"))
+    if force_cpu or not _CUDA_AVAILABLE:
+        device = torch.device("cpu")
+        backend = "gloo"
+    else:
+        device_ids = usable_gpu_ids(gpu_ids) if gpu_ids.strip() else list(range(_CUDA_COUNT))
+        if local_rank >= len(device_ids):
+            raise ValueError(f"LOCAL_RANK={local_rank} has no matching entry in gpu_ids={gpu_ids!r}")
+        device = torch.device(f"cuda:{device_ids[local_rank]}")
+        torch.cuda.set_device(device)
+        backend = "nccl"
+
+    dist.init_process_group(backend)
+    return DistributedContext(device=device, rank=dist.get_rank(), world_size=dist.get_world_size())
+
+
+def cleanup_distributed(context: DistributedContext) -> None:
+    if context.enabled and dist.is_initialized():
+        dist.destroy_process_group()
+
+
+def wrap_distributed(model: nn.Module, context: DistributedContext) -> nn.Module:
+    if not context.enabled:
+        return model
+    # CUDA-graph capture (reduce-overhead) and fullgraph do not mix with DDP's bucket hooks, so a model
+    # compiled by create_model is wrapped uncompiled and the DDP module is compiled in the default mode.
+    module = unwrap_model(model)
+    device_ids = [context.device.index] if context.device.type == "cuda" else None
+    wrapped = DistributedDataParallel(module, device_ids=device_ids, bucket_cap_mb=25)
+    return torch.compile(wrapped) if module is not model else wrapped
+
+
+def average_across_ranks(values: Sequence[torch.Tensor], context: DistributedContext) -> list[float]:
+    stats = torch.stack([value.detach().float() for value in values])
+    if context.enabled:
+        dist.all_reduce(stats)
+        stats /= context.world_size
+    return stats.tolist()
+
+
+def follow_main_rank(epochs: Iterable[Any], context: DistributedContext) -> None:
+    """Runs a non-zero rank through training for the gradient and metric all-reduces; rank 0 owns all outputs."""
+    for _ in epochs:
+        pass
+    cleanup_distributed(context)
+
+
+def _finite_or_none(value: Any) -> Any:
+    # Bare NaN/Infinity is not valid JSON for the UI; report non-finite metrics as null.
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if isinstance(value, dict):
+        return {key: _finite_or_none(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_finite_or_none(item) for item in value]
+    return value
+
+
+def _emit_lines(prefix: str, payloads: list[dict]) -> None:
+    if not payloads:
+        return
+    sys.stdout.write(
+        "".join(f"{prefix}{json.dumps(_finite_or_none(payload), ensure_ascii=False)}\n" for payload in payloads)
+    )
+    sys.stdout.flush()
+
+
 def emit_progress(payload: dict) -> None:
-    print(f"{PROGRESS_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _emit_lines(PROGRESS_PREFIX, [payload])
 
 
 def emit_run_meta(payload: dict) -> None:
-    print(f"{RUN_META_PREFIX}{json.dumps(payload, ensure_ascii=False)}", flush=True)
+    _emit_lines(RUN_META_PREFIX, [payload])
+
+
+class ProgressEmitter:
+    """Coalesces progress lines into one stdout write per interval; a timer flushes lines queued between intervals."""
+
+    def __init__(self, *, interval_sec: float = 0.05, max_pending: int = 32) -> None:
+        self._interval_sec = interval_sec
+        self._max_pending = max_pending
+        self._pending: list[dict] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+
+    def progress(self, payload: dict) -> None:
+        with self._lock:
+            self._pending.append(payload)
+            now = time.monotonic()
+            due = now - self._last_flush >= self._interval_sec or len(self._pending) >= self._max_pending
+            if not due and self._timer is None:
+                # Trainers emit once per epoch, so without a timer a line could wait for the next epoch.
+                self._timer = threading.Timer(self._interval_sec, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+        if due:
+            self.flush(now=now)
+
+    def flush(self, *, now: float | None = None) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            pending, self._pending = self._pending, []
+            _emit_lines(PROGRESS_PREFIX, pending)
+            self._last_flush = time.monotonic() if now is None else now
+
+    def __enter__(self) -> ProgressEmitter:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
+
+
+class MetricBatcher:
+    """Buffers MLflow metrics and sends them with one log_batch call every `flush_every` steps and on exit."""
+
+    def __init__(self, run_id: str, *, flush_every: int = 10) -> None:
+        self._run_id = run_id
+        self._client = mlflow.MlflowClient()
+        self._flush_every = flush_every
+        self._pending: list[Metric] = []
+        self._pending_steps = 0
+
+    def log(self, metrics: dict[str, float], *, step: int) -> None:
+        timestamp = int(time.time() * 1000)
+        self._pending.extend(Metric(key, float(value), timestamp, step) for key, value in metrics.items())
+        self._pending_steps += 1
+        if self._pending_steps >= self._flush_every:
+            self.flush()
+
+    def flush(self) -> None:
+        pending, self._pending = self._pending, []
+        self._pending_steps = 0
+        if pending:
+            self._client.log_batch(self._run_id, metrics=pending)
+
+    def __enter__(self) -> MetricBatcher:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.flush()
+
+
+def _snapshot_to_cpu(value: Any) -> Any:
+    if isinstance(value, torch.Tensor):
+        return value.detach().to("cpu", copy=True)
+    if isinstance(value, dict):
+        return {key: _snapshot_to_cpu(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_snapshot_to_cpu(item) for item in value)
+    return value
+
+
+class CheckpointWriter:
+    """Writes checkpoints and uploads them to MLflow on one background thread."""
+
+    def __init__(self, run_id: str) -> None:
+        self._run_id = run_id
+        # The fluent mlflow API tracks the active run per thread, so the worker logs through a client.
+        self._client = mlflow.MlflowClient()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="checkpoint-writer")
+        self._pending: list[Future[None]] = []
+
+    def save(self, checkpoint: dict[str, Any], destinations: Sequence[tuple[Path, str | None]]) -> None:
+        # Copy tensors now so the next optimizer step cannot change what gets written.
+        snapshot = _snapshot_to_cpu(checkpoint)
+        self._pending.append(self._executor.submit(self._write, snapshot, list(destinations)))
+
+    def _write(self, snapshot: dict[str, Any], destinations: list[tuple[Path, str | None]]) -> None:
+        for path, artifact_path in destinations:
+            torch.save(snapshot, path)
+            if artifact_path is not None:
+                self._client.log_artifact(self._run_id, str(path), artifact_path=artifact_path)
+
+    def close(self) -> None:
+        pending, self._pending = self._pending, []
+        self._executor.shutdown(wait=True)
+        for future in pending:
+            future.result()
+
+    def __enter__(self) -> CheckpointWriter:
+        return self
+
+    def __exit__(self, exc_type: object, *exc_info: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._executor.shutdown(wait=True)
+
+
+class SyntheticBatchFeeder:
+    """Refills reused batch buffers; on CUDA the next batch is generated on a side stream (double-buffered)."""
+
+    def __init__(
+        self,
+        allocate: Callable[[], tuple[torch.Tensor, ...]],
+        fill: Callable[..., None],
+        *,
+        device: torch.device,
+    ) -> None:
+        self._fill = fill
+        self._device = device
+        self._stream = torch.cuda.Stream(device=device) if device.type == "cuda" else None
+        self._buffers = [allocate() for _ in range(2 if self._stream is not None else 1)]
+
+    def batches(self, steps: int) -> Iterator[tuple[torch.Tensor, ...]]:
+        if self._stream is None:
+            (buffers,) = self._buffers
+            for _ in range(steps):
+                self._fill(*buffers)
+                yield buffers
+            return
+
+        main_stream = torch.cuda.current_stream(self._device)
+        self._stream.wait_stream(main_stream)
+        with torch.cuda.stream(self._stream):
+            self._fill(*self._buffers[0])
+
+        for step in range(steps):
+            main_stream.wait_stream(self._stream)
+            if step + 1 < steps:
+                # The other buffer set was last read by the previous step on the main stream.
+                self._stream.wait_stream(main_stream)
+                with torch.cuda.stream(self._stream):
+                    self._fill(*self._buffers[(step + 1) % 2])
+            yield self._buffers[step % 2]
+
+
+def build_adam(model: nn.Module, *, lr: float, device: torch.device) -> torch.optim.Adam:
+    """One fused Adam kernel on CUDA, multi-tensor (foreach) updates elsewhere; the two flags are mutually exclusive."""
+    fused = device.type == "cuda"
+    return torch.optim.Adam(model.parameters(), lr=lr, fused=fused, foreach=not fused)
+
+
+def configure_cuda_allocator() -> None:
+    # Trainer entrypoints only: the allocator reads this on the first CUDA allocation, and spawned ranks inherit it.
+    # PYTORCH_ALLOC_CONF is the newer spelling of the same knob.
+    if "PYTORCH_ALLOC_CONF" not in os.environ:
+        os.environ.setdefault("PYTORCH_CUDA_ALLOC_CONF", "expandable_segments:True,max_split_size_mb:256")
+
+
+def configure_torch_backends(device: torch.device) -> None:
+    if device.type != "cuda":
+        return
+    # TF32 matmuls/convs on Ampere+; synthetic batches have fixed shapes, so cuDNN autotuning pays off.
+    torch.set_float32_matmul_precision("high")
+    torch.backends.cudnn.allow_tf32 = True
+    torch.backends.cudnn.benchmark = True
+
+
+def image_memory_format(device: torch.device) -> torch.memory_format:
+    # Matches create_model(optimize_for_cuda=True), which moves conv weights to NHWC on GPU.
+    return torch.channels_last if device.type == "cuda" else torch.contiguous_format
+
+
+@lru_cache(maxsize=None)
+def autocast_dtype() -> torch.dtype:
+    return torch.bfloat16 if _CUDA_AVAILABLE and torch.cuda.is_bf16_supported() else torch.float16
+
+
+def needs_grad_scaler(device: torch.device, *, use_amp: bool) -> bool:
+    return use_amp and device.type == "cuda" and autocast_dtype() == torch.float16
+
+
+@contextmanager
+def maybe_autocast(device: torch.device, *, enabled: bool = True) -> Iterator[None]:
+    if enabled and device.type == "cuda":
+        with torch.autocast("cuda", dtype=autocast_dtype()):
+            yield
+    else:
+        yield
 
 
 def ensure_dirs(*paths: str) -> None:
     for path in paths:
-        Path(path).expanduser().resolve().mkdir(parents=True, exist_ok=True)
+        os.makedirs(os.path.expanduser(path), exist_ok=True)
+
+
+def write_config_sidecar(checkpoint_dir: Path, params: dict[str, Any], *, run_id: str) -> Path:
+    """Writes the run config once; epoch checkpoints store only this file's name instead of the whole config.
+
+    checkpoint_dir is shared between runs by default, so the file is named after the MLflow run id.
+    """
+    path = checkpoint_dir / f"config_{run_id}.json"
+    path.write_text(json.dumps(params, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
@@ -1,28 +1,54 @@
 from __future__ import annotations
 
+from collections.abc import Iterable
+from typing import ClassVar, Literal
+
 import torch
 from torch import nn
+from torch.ao.quantization import QuantWrapper, convert, fuse_modules, get_default_qconfig, prepare
+
+QuantizeMode = Literal["none", "int8"]
+
+
+def _as_float(x: torch.Tensor) -> torch.Tensor:
+    # int8 models receive already-quantized activations from their QuantStub.
+    return x if x.is_quantized else x.float()
+
+
+class GlobalAvgPool2d(nn.Module):
+    """Single mean reduction over H and W; replaces AdaptiveAvgPool2d((1, 1)) + Flatten."""
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return x.mean(dim=(2, 3))
 
 
 class TinyClassifier(nn.Module):
+    FUSE_GROUPS: ClassVar[list[list[str]]] = [["net.0", "net.1"], ["net.2", "net.3"]]
+
     def __init__(self, num_classes: int) -> None:
         super().__init__()
+        # Indices stay fixed (head at net.6) so saved state_dicts and pickled modules keep loading.
         self.net = nn.Sequential(
             nn.Conv2d(1, 16, kernel_size=3, padding=1),
             nn.ReLU(inplace=True),
             nn.Conv2d(16, 32, kernel_size=3, padding=1),
             nn.ReLU(inplace=True),
-            nn.AdaptiveAvgPool2d((1, 1)),
-            nn.Flatten(),
+            GlobalAvgPool2d(),
+            nn.Identity(),
             nn.Linear(32, num_classes),
         )
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        x = x.float()
-        return self.net(x)
+        return self.net(_as_float(x))
 
 
 class TinySegmenter(nn.Module):
+    FUSE_GROUPS: ClassVar[list[list[str]]] = [
+        ["encoder.0", "encoder.1"],
+        ["encoder.2", "encoder.3"],
+        ["decoder.0", "decoder.1"],
+    ]
+
     def __init__(self, num_classes: int) -> None:
         super().__init__()
         self.encoder = nn.Sequential(
@@ -38,12 +64,62 @@ class TinySegmenter(nn.Module):
         )
 
     def forward(self, x: torch.Tensor) -> torch.Tensor:
-        return self.decoder(self.encoder(x.float()))
+        return self.decoder(self.encoder(_as_float(x)))
 
 
-def create_model(task_type: str, num_classes: int) -> nn.Module:
+def unwrap_model(model: nn.Module) -> nn.Module:
+    # torch.compile wraps the module; checkpoints and MLflow models use the original keys.
+    return getattr(model, "_orig_mod", model)
+
+
+# Fused modules nest weights one level deeper (net.0.0.weight), so load checkpoints before fusing.
+def fuse_for_inference(model: nn.Module) -> nn.Module:
+    model.eval()
+    groups = getattr(model, "FUSE_GROUPS", None)
+    if groups:
+        fuse_modules(model, groups, inplace=True)
+    return model
+
+
+def quantize_int8(model: nn.Module, calibration_inputs: Iterable[torch.Tensor]) -> nn.Module:
+    wrapped = QuantWrapper(fuse_for_inference(model))
+    wrapped.qconfig = get_default_qconfig(torch.backends.quantized.engine)
+    prepare(wrapped, inplace=True)
+    with torch.no_grad():
+        for inputs in calibration_inputs:
+            wrapped(inputs.float())
+    return convert(wrapped, inplace=True)
+
+
+def create_model(
+    task_type: str,
+    num_classes: int,
+    *,
+    optimize_for_cuda: bool = False,
+    eval_mode: bool = False,
+    quantize: QuantizeMode = "none",
+    calibration_inputs: Iterable[torch.Tensor] | None = None,
+) -> nn.Module:
+    model: nn.Module
     if task_type == "classification":
-        return TinyClassifier(num_classes=num_classes)
-    if task_type == "segmentation":
-        return TinySegmenter(num_classes=num_classes)
-    raise ValueError(f"Unsupported task type: {task_type}")
+        model = TinyClassifier(num_classes=num_classes)
+    elif task_type == "segmentation":
+        model = TinySegmenter(num_classes=num_classes)
+    else:
+        raise ValueError(f"Unsupported task type: {task_type}")
+
+    if quantize == "int8":
+        if calibration_inputs is None:
+            raise ValueError("int8 quantization requires calibration_inputs")
+        return quantize_int8(model, calibration_inputs)
+    if quantize != "none":
+        raise ValueError(f"Unsupported quantize mode: {quantize}")
+
+    if eval_mode:
+        fuse_for_inference(model)
+
+    # NHWC convs + compiled graph only pay off on GPU; CPU and serving callers keep the eager NCHW module.
+    if optimize_for_cuda and torch.cuda.is_available():
+        model = model.to(memory_format=torch.channels_last)
+        model = torch.compile(model, mode="reduce-overhead", fullgraph=True)
+    return model
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
-import random
+from collections.abc import Iterator
 from pathlib import Path
 
 import mlflow
 import torch
 import torch.nn.functional as F
-from torch.optim import Adam
 from torch.utils.tensorboard import SummaryWriter
 
 from app.core.train_config import ClassificationTrainConfig, build_arg_parser, config_to_dict
-from trainers.common import emit_progress, emit_run_meta, ensure_dirs, pick_device, set_seed
-from trainers.models import create_model
+from trainers.common import (
+    CheckpointWriter,
+    DistributedContext,
+    MetricBatcher,
+    ProgressEmitter,
+    SyntheticBatchFeeder,
+    average_across_ranks,
+    build_adam,
+    cleanup_distributed,
+    configure_cuda_allocator,
+    configure_torch_backends,
+    emit_run_meta,
+    ensure_dirs,
+    follow_main_rank,
+    image_memory_format,
+    launch_training,
+    maybe_autocast,
+    needs_grad_scaler,
+    set_seed,
+    setup_distributed,
+    wrap_distributed,
+    write_config_sidecar,
+)
+from trainers.models import create_model, unwrap_model
 
 
 def evaluate(
@@ -22,36 +43,116 @@ def evaluate(
     image_size: int,
     num_classes: int,
     device: torch.device,
-) -> tuple[float, float]:
+) -> tuple[torch.Tensor, torch.Tensor]:
     model.eval()
 
-    total_loss = 0.0
-    total_correct = 0
-    total_samples = 0
+    total_loss = torch.zeros((), device=device)
+    total_correct = torch.zeros((), dtype=torch.long, device=device)
 
-    with torch.no_grad():
+    images = torch.empty(
+        batch_size, 1, image_size, image_size, device=device, memory_format=image_memory_format(device)
+    )
+    labels = torch.empty(batch_size, dtype=torch.long, device=device)
+
+    with torch.inference_mode():
         for _ in range(num_batches):
-            images = torch.randn(batch_size, 1, image_size, image_size, device=device)
-            labels = torch.randint(0, num_classes, (batch_size,), device=device)
+            images.normal_()
+            labels.random_(0, num_classes)
             logits = model(images)
             loss = F.cross_entropy(logits, labels)
             preds = torch.argmax(logits, dim=1)
-            total_correct += (preds == labels).sum().item()
-            total_samples += labels.numel()
-            total_loss += float(loss.item())
+            total_correct += (preds == labels).sum()
+            total_loss += loss
 
+    total_samples = num_batches * batch_size
     return total_loss / num_batches, total_correct / max(total_samples, 1)
 
 
+def train_epochs(
+    model: torch.nn.Module,
+    optimizer: torch.optim.Optimizer,
+    scaler: torch.amp.GradScaler,
+    *,
+    config: ClassificationTrainConfig,
+    context: DistributedContext,
+) -> Iterator[tuple[int, list[float]]]:
+    device = context.device
+
+    def allocate_batch() -> tuple[torch.Tensor, torch.Tensor]:
+        return (
+            torch.empty(
+                config.batch_size,
+                1,
+                config.image_size,
+                config.image_size,
+                device=device,
+                memory_format=image_memory_format(device),
+            ),
+            torch.empty(config.batch_size, dtype=torch.long, device=device),
+        )
+
+    def fill_batch(inputs: torch.Tensor, targets: torch.Tensor) -> None:
+        inputs.normal_()
+        targets.random_(0, config.num_classes)
+
+    feeder = SyntheticBatchFeeder(allocate_batch, fill_batch, device=device)
+
+    for epoch in range(1, config.epochs + 1):
+        model.train()
+        running_loss_t = torch.zeros((), device=device)
+        running_correct_t = torch.zeros((), dtype=torch.long, device=device)
+
+        for inputs, targets in feeder.batches(config.steps_per_epoch):
+            optimizer.zero_grad(set_to_none=True)
+
+            with maybe_autocast(device, enabled=config.use_amp):
+                logits = model(inputs)
+                loss = F.cross_entropy(logits, targets)
+
+            if scaler.is_enabled():
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+            else:
+                loss.backward()
+                optimizer.step()
+
+            preds = torch.argmax(logits, dim=1)
+            running_correct_t += (preds == targets).sum()
+            running_loss_t += loss.detach()
+
+        running_samples = config.steps_per_epoch * config.batch_size
+        train_loss = running_loss_t / config.steps_per_epoch
+        train_accuracy = running_correct_t / max(running_samples, 1)
+        val_loss, val_accuracy = evaluate(
+            model,
+            num_batches=max(2, config.steps_per_epoch // 2),
+            batch_size=config.batch_size,
+            image_size=config.image_size,
+            num_classes=config.num_classes,
+            device=device,
+        )
+        yield epoch, average_across_ranks([train_loss, train_accuracy, val_loss, val_accuracy], context)
+
+
 def train(config: ClassificationTrainConfig) -> None:
     ensure_dirs(config.output_root, config.checkpoint_dir, config.tensorboard_dir)
 
-    set_seed(config.seed)
-    device = pick_device(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    context = setup_distributed(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    set_seed(config.seed + context.rank)
+    device = context.device
+    configure_torch_backends(device)
 
-    model = create_model("classification", config.num_classes).to(device)
-    optimizer = Adam(model.parameters(), lr=config.learning_rate)
-    scaler = torch.cuda.amp.GradScaler(enabled=(config.use_amp and device.type == "cuda"))
+    model = create_model("classification", config.num_classes, optimize_for_cuda=device.type == "cuda").to(device)
+    base_model = unwrap_model(model)
+    model = wrap_distributed(model, context)
+    optimizer = build_adam(model, lr=config.learning_rate, device=device)
+    scaler = torch.amp.GradScaler("cuda", enabled=needs_grad_scaler(device, use_amp=config.use_amp))
+
+    epochs = train_epochs(model, optimizer, scaler, config=config, context=context)
+    if not context.is_main:
+        follow_main_rank(epochs, context)
+        return
 
     run_dir = Path(config.output_root).expanduser().resolve()
     checkpoint_dir = Path(config.checkpoint_dir).expanduser().resolve()
@@ -64,55 +165,27 @@ def train(config: ClassificationTrainConfig) -> None:
     best_val_accuracy = -1.0
     best_checkpoint_path = checkpoint_dir / "best_checkpoint.pt"
 
-    with mlflow.start_run(run_name=config.run_name) as run:
+    with (
+        mlflow.start_run(run_name=config.run_name) as run,
+        ProgressEmitter() as progress,
+        CheckpointWriter(run.info.run_id) as checkpoint_writer,
+        MetricBatcher(run.info.run_id) as metrics,
+    ):
         emit_run_meta({"mlflow_run_id": run.info.run_id, "task_type": "classification"})
 
         params = config_to_dict(config)
         params["task_type"] = "classification"
         mlflow.log_params(params)
+        config_path = write_config_sidecar(checkpoint_dir, params, run_id=run.info.run_id)
+        mlflow.log_artifact(str(config_path), artifact_path="checkpoints")
 
-        for epoch in range(1, config.epochs + 1):
-            model.train()
-            running_loss = 0.0
-            running_correct = 0
-            running_samples = 0
-
-            for _ in range(config.steps_per_epoch):
-                inputs = torch.randn(config.batch_size, 1, config.image_size, config.image_size, device=device)
-                targets = torch.randint(0, config.num_classes, (config.batch_size,), device=device)
-
-                optimizer.zero_grad(set_to_none=True)
-
-                with torch.cuda.amp.autocast(enabled=(config.use_amp and device.type == "cuda")):
-                    logits = model(inputs)
-                    loss = F.cross_entropy(logits, targets)
-
-                scaler.scale(loss).backward()
-                scaler.step(optimizer)
-                scaler.update()
-
-                preds = torch.argmax(logits, dim=1)
-                running_correct += (preds == targets).sum().item()
-                running_samples += targets.numel()
-                running_loss += float(loss.item())
-
-            train_loss = running_loss / config.steps_per_epoch
-            train_accuracy = running_correct / max(running_samples, 1)
-            val_loss, val_accuracy = evaluate(
-                model,
-                num_batches=max(2, config.steps_per_epoch // 2),
-                batch_size=config.batch_size,
-                image_size=config.image_size,
-                num_classes=config.num_classes,
-                device=device,
-            )
-
+        for epoch, (train_loss, train_accuracy, val_loss, val_accuracy) in epochs:
             writer.add_scalar("train/loss", train_loss, epoch)
             writer.add_scalar("train/accuracy", train_accuracy, epoch)
             writer.add_scalar("val/loss", val_loss, epoch)
             writer.add_scalar("val/accuracy", val_accuracy, epoch)
 
-            mlflow.log_metrics(
+            metrics.log(
                 {
                     "train_loss": train_loss,
                     "train_accuracy": train_accuracy,
@@ -126,23 +199,27 @@ def train(config: ClassificationTrainConfig) -> None:
                 "epoch": epoch,
                 "task_type": "classification",
                 "num_classes": config.num_classes,
-                "model_state_dict": model.state_dict(),
-                "optimizer_state_dict": optimizer.state_dict(),
-                "config": params,
+                "model_state_dict": base_model.state_dict(),
+                "mlflow_run_id": run.info.run_id,
+                "config_file": config_path.name,
                 "metric": {"val_accuracy": val_accuracy, "val_loss": val_loss},
             }
 
+            destinations: list[tuple[Path, str | None]] = []
             if epoch % config.save_every == 0:
-                epoch_ckpt = checkpoint_dir / f"epoch_{epoch}.pt"
-                torch.save(checkpoint, epoch_ckpt)
-                mlflow.log_artifact(str(epoch_ckpt), artifact_path="checkpoints")
+                destinations.append((checkpoint_dir / f"epoch_{epoch}.pt", "checkpoints"))
 
-            if val_accuracy > best_val_accuracy:
+            is_best = val_accuracy > best_val_accuracy
+            if is_best:
                 best_val_accuracy = val_accuracy
-                torch.save(checkpoint, best_checkpoint_path)
+                destinations.append((best_checkpoint_path, None))
+
+            if destinations:
+                if is_best or epoch % config.save_optimizer_every == 0:
+                    checkpoint["optimizer_state_dict"] = optimizer.state_dict()
+                checkpoint_writer.save(checkpoint, destinations)
 
-            progress_noise = random.uniform(-0.0005, 0.0005)
-            emit_progress(
+            progress.progress(
                 {
                     "task_type": "classification",
                     "epoch": epoch,
@@ -150,17 +227,20 @@ def train(config: ClassificationTrainConfig) -> None:
                     "train_loss": round(train_loss, 5),
                     "train_accuracy": round(train_accuracy, 5),
                     "val_loss": round(val_loss, 5),
-                    "val_accuracy": round(val_accuracy + progress_noise, 5),
+                    "val_accuracy": round(val_accuracy, 5),
                     "best_val_accuracy": round(best_val_accuracy, 5),
                     "device": str(device),
                 }
             )
 
+        progress.flush()
+        metrics.flush()
+        checkpoint_writer.close()
         torch.save(
             {
                 "task_type": "classification",
                 "num_classes": config.num_classes,
-                "model_state_dict": model.state_dict(),
+                "model_state_dict": base_model.state_dict(),
                 "config": params,
             },
             run_dir / "final_checkpoint.pt",
@@ -171,7 +251,7 @@ def train(config: ClassificationTrainConfig) -> None:
 
         try:
             mlflow.pytorch.log_model(
-                model,
+                base_model,
                 artifact_path="model",
                 code_paths=[str(Path(__file__).resolve().parents[1])],
             )
@@ -179,10 +259,12 @@ def train(config: ClassificationTrainConfig) -> None:
             print(f"[warn] mlflow.pytorch.log_model failed: {error}", flush=True)
 
     writer.close()
+    cleanup_distributed(context)
 
 
 if __name__ == "__main__":
+    configure_cuda_allocator()
     parser = build_arg_parser(ClassificationTrainConfig)
     args = parser.parse_args()
     config = ClassificationTrainConfig(**vars(args))
-    train(config)
+    launch_training(train, config)
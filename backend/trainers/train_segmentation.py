@@ -1,40 +1,88 @@
 from __future__ import annotations
 
+from collections.abc import Callable, Iterator
 from pathlib import Path
 
 import mlflow
 import torch
 import torch.nn.functional as F
-from torch.optim import Adam
 from torch.utils.tensorboard import SummaryWriter
 
 from app.core.train_config import SegmentationTrainConfig, build_arg_parser, config_to_dict
-from trainers.common import emit_progress, emit_run_meta, ensure_dirs, pick_device, set_seed
-from trainers.models import create_model
+from trainers.common import (
+    CheckpointWriter,
+    DistributedContext,
+    MetricBatcher,
+    ProgressEmitter,
+    SyntheticBatchFeeder,
+    average_across_ranks,
+    build_adam,
+    cleanup_distributed,
+    configure_cuda_allocator,
+    configure_torch_backends,
+    emit_run_meta,
+    ensure_dirs,
+    follow_main_rank,
+    image_memory_format,
+    launch_training,
+    maybe_autocast,
+    needs_grad_scaler,
+    set_seed,
+    setup_distributed,
+    wrap_distributed,
+    write_config_sidecar,
+)
+from trainers.models import create_model, unwrap_model
 
 
 def dice_loss(logits: torch.Tensor, targets: torch.Tensor, num_classes: int, eps: float = 1e-6) -> torch.Tensor:
     probs = torch.softmax(logits, dim=1)
-    one_hot = F.one_hot(targets.long(), num_classes=num_classes).permute(0, 3, 1, 2).float()
-
-    intersection = torch.sum(probs * one_hot, dim=(2, 3))
-    denominator = torch.sum(probs + one_hot, dim=(2, 3))
+    batch_size = probs.shape[0]
+    flat_targets = targets.long().reshape(batch_size, -1)
+
+    # Per-class sums over the target pixels, without materialising a B x C x H x W one-hot tensor.
+    target_probs = probs.gather(1, targets.long().unsqueeze(1)).reshape(batch_size, -1)
+    intersection = probs.new_zeros(batch_size, num_classes).scatter_add_(1, flat_targets, target_probs)
+    ones = torch.ones_like(target_probs)
+    target_counts = probs.new_zeros(batch_size, num_classes).scatter_add_(1, flat_targets, ones)
+    denominator = torch.sum(probs, dim=(2, 3)) + target_counts
     dice_score = (2 * intersection + eps) / (denominator + eps)
     return 1.0 - dice_score.mean()
 
 
-def mean_iou(logits: torch.Tensor, targets: torch.Tensor, num_classes: int, eps: float = 1e-6) -> float:
-    preds = torch.argmax(logits, dim=1)
-    ious: list[float] = []
+def segmentation_loss(
+    logits: torch.Tensor,
+    targets: torch.Tensor,
+    *,
+    num_classes: int,
+    ce_weight: float,
+    dice_weight: float,
+) -> torch.Tensor:
+    loss_ce = F.cross_entropy(logits, targets)
+    loss_dice = dice_loss(logits, targets, num_classes=num_classes)
+    return ce_weight * loss_ce + dice_weight * loss_dice
+
+
+def build_segmentation_loss(device: torch.device) -> Callable[..., torch.Tensor]:
+    # Inductor fuses softmax, the dice reductions and CE into a few kernels; CPU runs stay eager.
+    if device.type == "cuda":
+        return torch.compile(segmentation_loss, dynamic=False)
+    return segmentation_loss
 
-    for cls in range(num_classes):
-        pred_mask = preds == cls
-        target_mask = targets == cls
-        intersection = torch.logical_and(pred_mask, target_mask).sum().item()
-        union = torch.logical_or(pred_mask, target_mask).sum().item()
-        ious.append(float(intersection + eps) / float(union + eps))
 
-    return float(sum(ious) / max(len(ious), 1))
+def mean_iou(logits: torch.Tensor, targets: torch.Tensor, num_classes: int, eps: float = 1e-6) -> torch.Tensor:
+    preds = torch.argmax(logits, dim=1)
+    valid = (targets >= 0) & (targets < num_classes)
+    # Ignored pixels count into an overflow bin; static shapes and scatter_add_ (not bincount) avoid host syncs.
+    overflow = num_classes * num_classes
+    index = torch.where(valid, num_classes * targets.long() + preds, overflow).flatten()
+    counts = torch.zeros(overflow + 1, dtype=torch.long, device=index.device)
+    counts.scatter_add_(0, index, torch.ones_like(index))
+    confusion = counts[:overflow].reshape(num_classes, num_classes)
+
+    intersection = confusion.diag().float()
+    union = confusion.sum(0) + confusion.sum(1) - intersection
+    return ((intersection + eps) / (union.float() + eps)).mean()
 
 
 def evaluate(
@@ -48,35 +96,122 @@ def evaluate(
     dice_weight: float,
     ce_weight: float,
     device: torch.device,
-) -> tuple[float, float]:
+    loss_fn: Callable[..., torch.Tensor] = segmentation_loss,
+) -> tuple[torch.Tensor, torch.Tensor]:
     model.eval()
 
-    total_loss = 0.0
-    total_iou = 0.0
+    total_loss = torch.zeros((), device=device)
+    total_iou = torch.zeros((), device=device)
 
-    with torch.no_grad():
+    images = torch.empty(
+        batch_size, 1, input_height, input_width, device=device, memory_format=image_memory_format(device)
+    )
+    masks = torch.empty(batch_size, input_height, input_width, dtype=torch.long, device=device)
+
+    with torch.inference_mode():
         for _ in range(num_batches):
-            images = torch.randn(batch_size, 1, input_height, input_width, device=device)
-            masks = torch.randint(0, num_classes, (batch_size, input_height, input_width), device=device)
+            images.normal_()
+            masks.random_(0, num_classes)
 
             logits = model(images)
-            loss_ce = F.cross_entropy(logits, masks)
-            loss_dice = dice_loss(logits, masks, num_classes=num_classes)
-            total_loss += float(ce_weight * loss_ce + dice_weight * loss_dice)
+            total_loss += loss_fn(
+                logits, masks, num_classes=num_classes, ce_weight=ce_weight, dice_weight=dice_weight
+            )
             total_iou += mean_iou(logits, masks, num_classes)
 
     return total_loss / num_batches, total_iou / num_batches
 
 
+def train_epochs(
+    model: torch.nn.Module,
+    optimizer: torch.optim.Optimizer,
+    scaler: torch.amp.GradScaler,
+    *,
+    config: SegmentationTrainConfig,
+    context: DistributedContext,
+) -> Iterator[tuple[int, list[float]]]:
+    device = context.device
+    loss_fn = build_segmentation_loss(device)
+
+    def allocate_batch() -> tuple[torch.Tensor, torch.Tensor]:
+        return (
+            torch.empty(
+                config.batch_size,
+                1,
+                config.input_height,
+                config.input_width,
+                device=device,
+                memory_format=image_memory_format(device),
+            ),
+            torch.empty(config.batch_size, config.input_height, config.input_width, dtype=torch.long, device=device),
+        )
+
+    def fill_batch(images: torch.Tensor, masks: torch.Tensor) -> None:
+        images.normal_()
+        masks.random_(0, config.num_classes)
+
+    feeder = SyntheticBatchFeeder(allocate_batch, fill_batch, device=device)
+
+    for epoch in range(1, config.epochs + 1):
+        model.train()
+        running_loss_t = torch.zeros((), device=device)
+
+        for images, masks in feeder.batches(config.steps_per_epoch):
+            optimizer.zero_grad(set_to_none=True)
+            with maybe_autocast(device, enabled=config.use_amp):
+                logits = model(images)
+                loss = loss_fn(
+                    logits,
+                    masks,
+                    num_classes=config.num_classes,
+                    ce_weight=config.ce_weight,
+                    dice_weight=config.dice_weight,
+                )
+
+            if scaler.is_enabled():
+                scaler.scale(loss).backward()
+                scaler.step(optimizer)
+                scaler.update()
+            else:
+                loss.backward()
+                optimizer.step()
+
+            running_loss_t += loss.detach()
+
+        train_loss = running_loss_t / config.steps_per_epoch
+        val_loss, val_iou = evaluate(
+            model,
+            num_batches=max(2, config.steps_per_epoch // 2),
+            batch_size=config.batch_size,
+            input_height=config.input_height,
+            input_width=config.input_width,
+            num_classes=config.num_classes,
+            dice_weight=config.dice_weight,
+            ce_weight=config.ce_weight,
+            device=device,
+            loss_fn=loss_fn,
+        )
+        yield epoch, average_across_ranks([train_loss, val_loss, val_iou], context)
+
+
 def train(config: SegmentationTrainConfig) -> None:
     ensure_dirs(config.output_root, config.checkpoint_dir, config.tensorboard_dir)
 
-    set_seed(config.seed)
-    device = pick_device(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    context = setup_distributed(gpu_ids=config.gpu_ids, force_cpu=config.force_cpu)
+    set_seed(config.seed + context.rank)
+    device = context.device
+    configure_torch_backends(device)
 
-    model = create_model("segmentation", config.num_classes).to(device)
-    optimizer = Adam(model.parameters(), lr=config.learning_rate)
-    scaler = torch.cuda.amp.GradScaler(enabled=(config.use_amp and device.type == "cuda"))
+    model = create_model("segmentation", config.num_classes, optimize_for_cuda=device.type == "cuda").to(device)
+    base_model = unwrap_model(model)
+    model = wrap_distributed(model, context)
+    optimizer = build_adam(model, lr=config.learning_rate, device=device)
+    scaler = torch.amp.GradScaler("cuda", enabled=needs_grad_scaler(device, use_amp=config.use_amp))
+
+    epochs = train_epochs(model, optimizer, scaler, config=config, context=context)
+    if not context.is_main:
+        follow_main_rank(epochs, context)
+        return
 
     run_dir = Path(config.output_root).expanduser().resolve()
     checkpoint_dir = Path(config.checkpoint_dir).expanduser().resolve()
@@ -89,63 +224,26 @@ def train(config: SegmentationTrainConfig) -> None:
     best_val_iou = -1.0
     best_checkpoint_path = checkpoint_dir / "best_checkpoint.pt"
 
-    with mlflow.start_run(run_name=config.run_name) as run:
+    with (
+        mlflow.start_run(run_name=config.run_name) as run,
+        ProgressEmitter() as progress,
+        CheckpointWriter(run.info.run_id) as checkpoint_writer,
+        MetricBatcher(run.info.run_id) as metrics,
+    ):
         emit_run_meta({"mlflow_run_id": run.info.run_id, "task_type": "segmentation"})
 
         params = config_to_dict(config)
         params["task_type"] = "segmentation"
         mlflow.log_params(params)
+        config_path = write_config_sidecar(checkpoint_dir, params, run_id=run.info.run_id)
+        mlflow.log_artifact(str(config_path), artifact_path="checkpoints")
 
-        for epoch in range(1, config.epochs + 1):
-            model.train()
-            running_loss = 0.0
-
-            for _ in range(config.steps_per_epoch):
-                images = torch.randn(
-                    config.batch_size,
-                    1,
-                    config.input_height,
-                    config.input_width,
-                    device=device,
-                )
-                masks = torch.randint(
-                    0,
-                    config.num_classes,
-                    (config.batch_size, config.input_height, config.input_width),
-                    device=device,
-                )
-
-                optimizer.zero_grad(set_to_none=True)
-                with torch.cuda.amp.autocast(enabled=(config.use_amp and device.type == "cuda")):
-                    logits = model(images)
-                    loss_ce = F.cross_entropy(logits, masks)
-                    loss_dice = dice_loss(logits, masks, num_classes=config.num_classes)
-                    loss = config.ce_weight * loss_ce + config.dice_weight * loss_dice
-
-                scaler.scale(loss).backward()
-                scaler.step(optimizer)
-                scaler.update()
-
-                running_loss += float(loss.item())
-
-            train_loss = running_loss / config.steps_per_epoch
-            val_loss, val_iou = evaluate(
-                model,
-                num_batches=max(2, config.steps_per_epoch // 2),
-                batch_size=config.batch_size,
-                input_height=config.input_height,
-                input_width=config.input_width,
-                num_classes=config.num_classes,
-                dice_weight=config.dice_weight,
-                ce_weight=config.ce_weight,
-                device=device,
-            )
-
+        for epoch, (train_loss, val_loss, val_iou) in epochs:
             writer.add_scalar("train/loss", train_loss, epoch)
             writer.add_scalar("val/loss", val_loss, epoch)
             writer.add_scalar("val/iou", val_iou, epoch)
 
-            mlflow.log_metrics(
+            metrics.log(
                 {
                     "train_loss": train_loss,
                     "val_loss": val_loss,
@@ -158,22 +256,27 @@ def train(config: SegmentationTrainConfig) -> None:
                 "epoch": epoch,
                 "task_type": "segmentation",
                 "num_classes": config.num_classes,
-                "model_state_dict": model.state_dict(),
-                "optimizer_state_dict": optimizer.state_dict(),
-                "config": params,
+                "model_state_dict": base_model.state_dict(),
+                "mlflow_run_id": run.info.run_id,
+                "config_file": config_path.name,
                 "metric": {"val_iou": val_iou, "val_loss": val_loss},
             }
 
+            destinations: list[tuple[Path, str | None]] = []
             if epoch % config.save_every == 0:
-                epoch_ckpt = checkpoint_dir / f"epoch_{epoch}.pt"
-                torch.save(checkpoint, epoch_ckpt)
-                mlflow.log_artifact(str(epoch_ckpt), artifact_path="checkpoints")
+                destinations.append((checkpoint_dir / f"epoch_{epoch}.pt", "checkpoints"))
 
-            if val_iou > best_val_iou:
+            is_best = val_iou > best_val_iou
+            if is_best:
                 best_val_iou = val_iou
-                torch.save(checkpoint, best_checkpoint_path)
+                destinations.append((best_checkpoint_path, None))
+
+            if destinations:
+                if is_best or epoch % config.save_optimizer_every == 0:
+                    checkpoint["optimizer_state_dict"] = optimizer.state_dict()
+                checkpoint_writer.save(checkpoint, destinations)
 
-            emit_progress(
+            progress.progress(
                 {
                     "task_type": "segmentation",
                     "epoch": epoch,
@@ -186,11 +289,14 @@ def train(config: SegmentationTrainConfig) -> None:
                 }
             )
 
+        progress.flush()
+        metrics.flush()
+        checkpoint_writer.close()
         torch.save(
             {
                 "task_type": "segmentation",
                 "num_classes": config.num_classes,
-                "model_state_dict": model.state_dict(),
+                "model_state_dict": base_model.state_dict(),
                 "config": params,
             },
             run_dir / "final_checkpoint.pt",
@@ -201,7 +307,7 @@ def train(config: SegmentationTrainConfig) -> None:
 
         try:
             mlflow.pytorch.log_model(
-                model,
+                base_model,
                 artifact_path="model",
                 code_paths=[str(Path(__file__).resolve().parents[1])],
             )
@@ -209,10 +315,12 @@ def train(config: SegmentationTrainConfig) -> None:
             print(f"[warn] mlflow.pytorch.log_model failed: {error}", flush=True)
 
     writer.close()
+    cleanup_distributed(context)
 
 
 if __name__ == "__main__":
+    configure_cuda_allocator()
     parser = build_arg_parser(SegmentationTrainConfig)
     args = parser.parse_args()
     config = SegmentationTrainConfig(**vars(args))
-    train(config)
+    launch_training(train, config)
@@ -54,6 +54,7 @@ const FULL_CATALOG_TEMPLATE = `tasks:
       - use_amp
       - force_cpu
       - save_every
+      - save_optimizer_every
       - model_name
       - num_classes
       - image_size
@@ -95,6 +96,7 @@ const FULL_CATALOG_TEMPLATE = `tasks:
       - use_amp
       - force_cpu
       - save_every
+      - save_optimizer_every
       - encoder_name
       - num_classes
       - input_height
@@ -141,6 +143,7 @@ const CLASSIFICATION_CATALOG_TEMPLATE = `tasks:
       - use_amp
       - force_cpu
       - save_every
+      - save_optimizer_every
       - model_name
       - num_classes
       - image_size
@@ -184,6 +187,7 @@ const SEGMENTATION_CATALOG_TEMPLATE = `tasks:
       - use_amp
       - force_cpu
       - save_every
+      - save_optimizer_every
       - encoder_name
       - num_classes
       - input_height
@@ -301,6 +305,7 @@ export function buildTaskSnippet(draft: BuilderDraft): string {
     '      - use_amp',
     '      - force_cpu',
     '      - save_every',
+    '      - save_optimizer_every',
     `      - ${coreModelField}`,
     '      - num_classes',
     '      - steps_per_epoch',